@@ -0,0 +1,72 @@
+import json
+import os
+
+CONFIG_PATH = "~/.config/vosk-dictation/config.json"
+
+
+class AppConfig:
+    # Settings persisted as JSON. defaults (usually the app's module constants) fix the set of
+    # keys and their types; values in the file that are unknown or of the wrong type are ignored,
+    # so an old or hand-edited file can never break startup.
+    def __init__(self, defaults, path=CONFIG_PATH):
+        self.defaults = dict(defaults)
+        self.path = os.path.expanduser(path)
+        self.values = dict(self.defaults)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable config {self.path}: {e}")
+            return self
+        for key, value in stored.items():
+            try:
+                self.values[key] = self.coerce(key, value)
+            except (KeyError, TypeError, ValueError):
+                print(f"Ignoring config value {key}={value!r}")
+        return self
+
+    def save(self):
+        # Write to a temporary file and rename, so a crash never leaves a truncated config
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def coerce(self, key, value):
+        # Convert value (possibly a string typed into the Settings dialog) to the type of the default
+        default = self.defaults[key]
+        if value is None or (isinstance(value, str) and not value.strip()):
+            # Empty is only valid where the default is empty too (input_device "" = auto)
+            if default is None or default == "":
+                return default
+            raise ValueError(f"{key} needs a value")
+        if isinstance(default, str):
+            return str(value)
+        if isinstance(default, bool):
+            if isinstance(value, str):
+                return value.strip().lower() in ("1", "true", "yes", "on")
+            return bool(value)
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float) or default is None:
+            return float(value)
+        if isinstance(default, list):
+            if isinstance(value, str):
+                return [item.strip() for item in value.split(",") if item.strip()]
+            return list(value)
+        raise TypeError(f"Unsupported config type for {key}")
+
+    def update(self, changes):
+        # Coerces and stores changes, returns the keys whose value actually changed
+        coerced = {key: self.coerce(key, value) for key, value in changes.items()}
+        changed = {key for key, value in coerced.items() if self.values.get(key) != value}
+        self.values.update(coerced)
+        return changed
+
+    def __getitem__(self, key):
+        return self.values[key]
@@ -0,0 +1,168 @@
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Overload policies for BoundedAudioQueue
+#   block        - the capture thread waits for the recognizer (PortAudio may overflow instead)
+#   drop_oldest  - discard the oldest queued chunk to make room for the new one
+#   skip_silence - discard queued silence first, then incoming silence, then the oldest chunk
+QUEUE_POLICIES = ("block", "drop_oldest", "skip_silence")
+
+
+def chunk_energy(audio_chunk):
+    # Mean absolute amplitude; widen first so -32768 does not overflow in np.abs
+    return float(np.mean(np.abs(audio_chunk.astype(np.int32))))
+
+
+class BoundedAudioQueue:
+    def __init__(self, maxsize=50, policy="drop_oldest", silence_threshold=100, chunk_duration=0.1):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {QUEUE_POLICIES}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.silence_threshold = silence_threshold
+        self.chunk_duration = chunk_duration  # Seconds of audio per chunk, used for lag reporting
+
+        self._items = deque()  # (chunk, is_silent, enqueue_time)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        # Counters
+        self.put_count = 0  # Chunks offered by the producer, including ones shed on overload
+        self.dropped_count = 0  # Speech (or unclassified) chunks discarded on overload
+        self.skipped_silence_count = 0  # Silent chunks discarded on overload
+        self.blocked_seconds = 0.0  # Time the producer spent waiting under the "block" policy
+        self.max_lag = 0.0
+
+    def put(self, audio_chunk, block=True, timeout=None):
+        # None is used as an end-of-stream sentinel and always gets through
+        if audio_chunk is None:
+            with self._lock:
+                self._items.append((None, False, time.monotonic()))
+                self._not_empty.notify()
+            return True
+
+        is_silent = chunk_energy(audio_chunk) <= self.silence_threshold
+        with self._not_full:
+            self.put_count += 1
+            while len(self._items) >= self.maxsize:
+                if self.policy == "block" and block:
+                    started = time.monotonic()
+                    if not self._not_full.wait(timeout):
+                        self.blocked_seconds += time.monotonic() - started
+                        raise queue.Full
+                    self.blocked_seconds += time.monotonic() - started
+                elif self.policy == "skip_silence":
+                    silent_index = self._oldest_silent_index()
+                    if silent_index is not None:
+                        del self._items[silent_index]
+                        self.skipped_silence_count += 1
+                    elif is_silent:
+                        # Nothing silent to evict, so the incoming silence is the cheapest loss
+                        self.skipped_silence_count += 1
+                        return False
+                    else:
+                        self._items.popleft()
+                        self.dropped_count += 1
+                else:
+                    # drop_oldest, or a non-blocking put under the "block" policy
+                    self._items.popleft()
+                    self.dropped_count += 1
+
+            self._items.append((audio_chunk, is_silent, time.monotonic()))
+            self.max_lag = max(self.max_lag, self._lag_locked())
+            self._not_empty.notify()
+        return True
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            audio_chunk, _, _ = self._items.popleft()
+            self._not_full.notify()
+            return audio_chunk
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        with self._lock:
+            return len(self._items)
+
+    def empty(self):
+        with self._lock:
+            return not self._items
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._not_full.notify_all()
+
+    def reconfigure(self, maxsize=None, policy=None, silence_threshold=None, chunk_duration=None):
+        # Safe while the queue is in use; a smaller maxsize sheds chunks on the next put
+        if policy is not None and policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {QUEUE_POLICIES}")
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if policy is not None:
+                self.policy = policy
+            if silence_threshold is not None:
+                self.silence_threshold = silence_threshold
+            if chunk_duration is not None:
+                self.chunk_duration = chunk_duration
+            self._not_full.notify_all()
+
+    def lag_seconds(self):
+        # Seconds of audio waiting to be recognized
+        with self._lock:
+            return self._lag_locked()
+
+    def oldest_age(self):
+        # Wall-clock seconds the oldest queued chunk has been waiting
+        with self._lock:
+            if not self._items:
+                return 0.0
+            return time.monotonic() - self._items[0][2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": sum(1 for item in self._items if item[0] is not None),  # Chunks, not sentinels
+                "maxsize": self.maxsize,
+                "policy": self.policy,
+                "lag_seconds": self._lag_locked(),
+                "max_lag_seconds": self.max_lag,
+                "put": self.put_count,
+                "dropped": self.dropped_count,
+                "skipped_silence": self.skipped_silence_count,
+                "blocked_seconds": self.blocked_seconds,
+            }
+
+    def _lag_locked(self):
+        return sum(1 for item in self._items if item[0] is not None) * self.chunk_duration
+
+    def _oldest_silent_index(self):
+        for index, (audio_chunk, is_silent, _) in enumerate(self._items):
+            if is_silent and audio_chunk is not None:
+                return index
+        return None
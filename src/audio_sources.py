@@ -0,0 +1,241 @@
+import time
+import wave
+
+import numpy as np
+
+# Audio sources share the small part of sounddevice.InputStream the engine uses:
+# a context manager whose read(frames) returns (int16 array of shape (frames, 1), overflowed).
+# A read that returns fewer frames than requested (possibly none) marks the end of the stream.
+
+
+class AudioSource:
+    def __init__(self, samplerate=16000, speed=None):
+        self.samplerate = samplerate
+        self.speed = speed  # Pacing for recorded/generated audio: 1.0 is real time, None is unthrottled
+        self._started = None
+        self._position = 0  # Frames delivered so far
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self, frames):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _pace(self, frames):
+        # Sleep until frames more samples are due at self.speed times real time
+        if self._started is None:
+            self._started = time.monotonic()
+        self._position += frames
+        if not self.speed:
+            return
+        delay = self._started + self._position / self.samplerate / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def rescan_devices(sd):
+    # PortAudio only rescans devices when it is initialized, and sounddevice has no public call
+    # for that. Its private _terminate/_initialize pair is the documented workaround; if a
+    # sounddevice release drops them, reconnecting only finds devices PortAudio already knew.
+    # Only call this with no stream of this process open: terminating closes them all.
+    terminate = getattr(sd, "_terminate", None)
+    initialize = getattr(sd, "_initialize", None)
+    if terminate is None or initialize is None:
+        return False
+    terminate()
+    initialize()
+    return True
+
+
+class MicrophoneSource(AudioSource):
+    # If the device disappears (USB headset unplugged, PipeWire restart), read() keeps returning
+    # silence in real time while it tries to reopen the same device about once a second, so the
+    # session survives and a stop request is still noticed. After reconnect_timeout seconds
+    # without a device the original error is raised.
+    def __init__(self, samplerate=16000, device=None, blocksize=0, latency=None, reconnect_timeout=30.0):
+        super().__init__(samplerate)
+        self.device = device
+        self.blocksize = blocksize
+        self.latency = latency
+        self.reconnect_timeout = reconnect_timeout
+        self.reconnects = 0
+        self._stream = None
+        self._lost_error = None
+        self._lost_since = None
+        self._next_attempt = 0.0
+
+    def open(self):
+        import sounddevice as sd  # Imported lazily so the engine can run without PortAudio
+        self._sd = sd
+        # The probed block size and latency apply to the default-device fallback too
+        stream_settings = dict(samplerate=self.samplerate, channels=1, dtype='int16', blocksize=self.blocksize,
+                               latency=self.latency)
+        try:
+            self._stream = sd.InputStream(device=self.device, **stream_settings)
+        except ValueError as e:
+            if self.device is None:
+                raise
+            # sounddevice raises ValueError when no device matches: the preferred one is not plugged in
+            print(f"Input device {self.device!r} not available ({e}), using the default device")
+            self._stream = sd.InputStream(**stream_settings)
+        self._stream.start()
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except self._sd.PortAudioError:
+                pass  # The device is already gone
+            self._stream = None
+
+    def read(self, frames):
+        if self._stream is not None:
+            try:
+                return self._stream.read(frames)
+            except self._sd.PortAudioError as e:
+                print(f"Audio input lost: {e}")
+                self._lost_error = e
+                self._lost_since = time.monotonic()
+                self._next_attempt = 0.0
+                self.close()
+        return self._reconnect(frames)
+
+    def _reconnect(self, frames):
+        now = time.monotonic()
+        if now - self._lost_since > self.reconnect_timeout:
+            raise self._lost_error
+        if now >= self._next_attempt:
+            self._next_attempt = now + 1.0
+            try:
+                rescan_devices(self._sd)
+                self.open()
+            except (self._sd.PortAudioError, ValueError):
+                self._stream = None
+            else:
+                self.reconnects += 1
+                print(f"Audio input reconnected to {self.device or 'the default device'}")
+                return self._stream.read(frames)
+        time.sleep(frames / self.samplerate)
+        return np.zeros((frames, 1), dtype=np.int16), False
+
+
+class SyntheticSource(AudioSource):
+    # Plays a script of ("speech" | "silence", seconds) sections. Speech is a syllable-modulated
+    # harmonic tone well above SILENCE_THRESHOLD, silence is low-level noise. speed=100 delivers
+    # audio 100x faster than real time; speed=None delivers it as fast as the reader asks.
+    def __init__(self, script, samplerate=16000, speed=1.0, speech_level=3000, noise_level=20, loop=False, seed=0):
+        super().__init__(samplerate, speed)
+        self.script = list(script)
+        self.speech_level = speech_level
+        self.noise_level = noise_level
+        self.loop = loop
+        self._rng = np.random.default_rng(seed)
+        self._section = 0
+        self._section_offset = 0
+
+    def open(self):
+        self._section = 0
+        self._section_offset = 0
+        self._position = 0
+        self._started = None
+
+    def speech_spans(self):
+        # Ground truth (start, end) seconds of every speech section, for one pass over the script
+        spans = []
+        position = 0.0
+        for kind, seconds in self.script:
+            if kind == "speech":
+                spans.append((position, position + seconds))
+            position += seconds
+        return spans
+
+    def read(self, frames):
+        pieces = []
+        remaining = frames
+        while remaining > 0:
+            if self._section >= len(self.script):
+                if not self.loop or not self.script:
+                    break
+                self._section = 0
+            kind, seconds = self.script[self._section]
+            section_frames = int(seconds * self.samplerate)
+            count = min(remaining, section_frames - self._section_offset)
+            if count > 0:
+                pieces.append(self._generate(kind, self._section_offset, count))
+                self._section_offset += count
+                remaining -= count
+            if self._section_offset >= section_frames:
+                self._section += 1
+                self._section_offset = 0
+
+        audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int16)
+        self._pace(len(audio))
+        return audio.reshape(-1, 1), False
+
+    def _generate(self, kind, offset, count):
+        noise = self._rng.normal(0, self.noise_level, count)
+        if kind != "speech":
+            return np.clip(noise, -32768, 32767).astype(np.int16)
+        t = (offset + np.arange(count)) / self.samplerate
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)  # Roughly four syllables per second
+        tone = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+        return np.clip(self.speech_level * envelope * tone + noise, -32768, 32767).astype(np.int16)
+
+
+class WavFileSource(AudioSource):
+    # 16-bit mono WAV file at the engine's sample rate
+    def __init__(self, path, samplerate=16000, speed=None):
+        super().__init__(samplerate, speed)
+        self.path = path
+        self._wave = None
+
+    def open(self):
+        self._wave = wave.open(self.path, "rb")
+        if self._wave.getsampwidth() != 2 or self._wave.getnchannels() != 1:
+            self._wave.close()
+            raise ValueError(f"{self.path}: expected 16-bit mono audio")
+        if self._wave.getframerate() != self.samplerate:
+            self._wave.close()
+            raise ValueError(f"{self.path}: sample rate {self._wave.getframerate()} Hz, expected {self.samplerate} Hz")
+        self._position = 0
+        self._started = None
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+
+    def read(self, frames):
+        audio = np.frombuffer(self._wave.readframes(frames), dtype=np.int16)
+        self._pace(len(audio))
+        return audio.reshape(-1, 1), False
+
+
+class RawPcmSource(AudioSource):
+    # Headerless 16-bit little-endian mono PCM from a binary stream, e.g. sys.stdin.buffer fed by
+    # `arecord -f S16_LE -r 16000 -c 1` or `ffmpeg ... -f s16le -ac 1 -ar 16000 -`
+    def __init__(self, stream, samplerate=16000, speed=None):
+        super().__init__(samplerate, speed)
+        self.stream = stream
+
+    def read(self, frames):
+        data = b""
+        # Pipes return short reads; keep reading until the block is full or the stream ends
+        while len(data) < frames * 2:
+            piece = self.stream.read(frames * 2 - len(data))
+            if not piece:
+                break
+            data += piece
+        audio = np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2").astype(np.int16)
+        self._pace(len(audio))
+        return audio.reshape(-1, 1), False
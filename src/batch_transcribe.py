@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_registry import ModelRegistry
+from transcript_cache import CACHE_DIR, TranscriptCache, audio_digest, model_identity
+
+# Transcribes long recordings in parallel. A vectorized energy pass over each file finds long
+# silences; the file is cut in the middle of them into spans of at least --min-span seconds,
+# which are independent utterance-wise and are decoded by a pool of worker processes, each with
+# its own model. Results are stitched back in order with word times shifted by the span start.
+#
+#   python batch_transcribe.py meeting.wav --workers 8 > meeting.txt
+#   python batch_transcribe.py *.wav --jsonl --model vosk-model-small-en-us-0.15
+#
+# Every worker loads the model, so memory grows with --workers; small models fit many workers.
+# Transcripts are cached by audio content, model and settings (transcript_cache.py), so
+# re-running a job only decodes files that are new or changed.
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "../models")
+FRAME_SECONDS = 0.01  # Resolution of the energy scan
+DECODE_CHUNK_SECONDS = 0.2
+
+_recognizer_factory = None  # Set in each worker by init_worker
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono audio")
+        return wav.getframerate(), wav.getnframes()
+
+
+def frame_energies(path, samplerate, block_seconds=600):
+    # Mean absolute amplitude of every 10 ms frame, read in blocks so a three-hour file is never
+    # held in memory at once
+    frame = int(samplerate * FRAME_SECONDS)
+    energies = []
+    with wave.open(path, "rb") as wav:
+        while True:
+            audio = np.frombuffer(wav.readframes(int(block_seconds * samplerate)), dtype=np.int16)
+            if len(audio) == 0:
+                break
+            usable = len(audio) // frame * frame
+            if usable:
+                energies.append(np.abs(audio[:usable].astype(np.int32).reshape(-1, frame)).mean(axis=1))
+            if usable < len(audio):
+                energies.append(np.array([np.abs(audio[usable:].astype(np.int32)).mean()]))
+    return np.concatenate(energies) if energies else np.zeros(0)
+
+
+def split_points(energies, silence_threshold=100, min_silence=0.8, min_span=30.0, max_span=120.0):
+    # Frame indexes to cut at: the middle of silences of at least min_silence seconds, no closer
+    # together than min_span. A stretch longer than max_span without such a silence is cut at its
+    # quietest frame, as the live engine does for unbroken speech.
+    silent = energies <= silence_threshold
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    long_runs = (ends - starts) * FRAME_SECONDS >= min_silence
+    candidates = (starts[long_runs] + ends[long_runs]) // 2
+
+    min_frames = int(min_span / FRAME_SECONDS)
+    max_frames = int(max_span / FRAME_SECONDS)
+    cuts = []
+    last = 0
+    for candidate in list(candidates) + [len(energies)]:
+        while candidate - last > max_frames:
+            window = energies[last + min_frames:last + max_frames]
+            last = last + min_frames + int(np.argmin(window))
+            cuts.append(last)
+        if candidate - last >= min_frames and candidate < len(energies):
+            cuts.append(int(candidate))
+            last = candidate
+    return cuts
+
+
+def plan_spans(path, silence_threshold, min_silence, min_span, max_span):
+    samplerate, frames = read_wav(path)
+    energies = frame_energies(path, samplerate)
+    frame = int(samplerate * FRAME_SECONDS)
+    bounds = [0] + [cut * frame for cut in split_points(energies, silence_threshold, min_silence, min_span, max_span)] + [frames]
+    return samplerate, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def make_vosk_recognizer_factory(model_name):
+    import vosk
+    vosk.SetLogLevel(-1)
+    model = ModelRegistry(MODELS_DIR, float("inf")).get(model_name)
+    return lambda samplerate: vosk.KaldiRecognizer(model, samplerate)
+
+
+def make_fake_recognizer_factory(realtime_factor):
+    from fake_recognizer import FakeRecognizer
+    return lambda samplerate: FakeRecognizer(samplerate, realtime_factor=realtime_factor)
+
+
+def init_worker(model_name, fake_realtime_factor):
+    # Runs once per worker process: load the model a single time for all of its spans
+    global _recognizer_factory
+    if fake_realtime_factor is not None:
+        _recognizer_factory = make_fake_recognizer_factory(fake_realtime_factor)
+    else:
+        _recognizer_factory = make_vosk_recognizer_factory(model_name)
+
+
+def decode_span(task):
+    path, samplerate, start, end = task
+    recognizer = _recognizer_factory(samplerate)
+    recognizer.SetWords(True)
+    offset = start / samplerate
+    chunk = int(samplerate * DECODE_CHUNK_SECONDS)
+    results = []
+    with wave.open(path, "rb") as wav:
+        wav.setpos(start)
+        remaining = end - start
+        while remaining > 0:
+            data = wav.readframes(min(chunk, remaining))
+            remaining -= len(data) // 2
+            if recognizer.AcceptWaveform(data):
+                results.append(json.loads(recognizer.Result()))
+    results.append(json.loads(recognizer.FinalResult()))
+
+    segments = []
+    for result in results:
+        if not result.get("text"):
+            continue
+        words = [dict(word, start=round(word["start"] + offset, 2), end=round(word["end"] + offset, 2))
+                 for word in result.get("result", [])]
+        segments.append({"text": result["text"], "start": words[0]["start"] if words else round(offset, 2),
+                         "end": words[-1]["end"] if words else round(end / samplerate, 2), "words": words})
+    return segments
+
+
+def format_time(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def print_segments(path, segments, args):
+    for segment in segments:
+        if args.jsonl:
+            if not args.words:
+                segment = {key: value for key, value in segment.items() if key != "words"}
+            print(json.dumps(dict(segment, file=path), ensure_ascii=False), flush=True)
+        else:
+            print(f"[{format_time(segment['start'])}] {segment['text']}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe long WAV recordings in parallel, split at silences")
+    parser.add_argument("files", nargs="+", help="16-bit mono WAV files")
+    parser.add_argument("--model", default="vosk-model-en-us-0.22", help="model directory name under models/, or a path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="decoding processes")
+    parser.add_argument("--silence-threshold", type=float, default=100)
+    parser.add_argument("--min-silence", type=float, default=0.8, help="shortest silence to split at, seconds")
+    parser.add_argument("--min-span", type=float, default=30.0, help="shortest span handed to a worker, seconds")
+    parser.add_argument("--max-span", type=float, default=120.0, help="force a split after this long without silence")
+    parser.add_argument("--jsonl", action="store_true", help="one JSON object per segment instead of text lines")
+    parser.add_argument("--words", action="store_true", help="include per-word timings with --jsonl")
+    parser.add_argument("--fake", type=float, metavar="REALTIME_FACTOR",
+                        help="use the fake recognizer with this decode cost per second of audio, for benchmarking")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="transcript cache directory")
+    parser.add_argument("--cache-size-mb", type=float, default=512, help="transcript cache size limit, 0 = no cache")
+    args = parser.parse_args()
+    if args.max_span <= args.min_span:
+        parser.error("--max-span must be longer than --min-span")
+
+    started = time.perf_counter()
+    cache = TranscriptCache(args.cache_dir, args.cache_size_mb * 2**20) if args.cache_size_mb > 0 else None
+    if cache is not None:
+        model_id = f"fake:{args.fake}" if args.fake is not None else model_identity(ModelRegistry(MODELS_DIR, float("inf")).resolve(args.model))
+        settings = {key: getattr(args, key) for key in ("silence_threshold", "min_silence", "min_span", "max_span")}
+
+    jobs = []  # (path, cache key, cached segments or None, number of spans to decode)
+    tasks = []
+    audio_seconds = 0.0
+    for path in args.files:
+        key = cached = None
+        samplerate, frames = read_wav(path)
+        audio_seconds += frames / samplerate
+        if cache is not None:
+            key = cache.key(audio_digest(path), model_id, settings)
+            cached = cache.get(key)
+        if cached is not None:
+            jobs.append((path, key, cached, 0))
+            continue
+        samplerate, spans = plan_spans(path, args.silence_threshold, args.min_silence, args.min_span, args.max_span)
+        tasks += [(path, samplerate, start, end) for start, end in spans]
+        jobs.append((path, key, None, len(spans)))
+    planned = time.perf_counter()
+
+    workers = max(1, min(args.workers, len(tasks)))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(args.model, args.fake)) as pool:
+        # map keeps task order, so the spans come back in file and time order
+        results = pool.map(decode_span, tasks) if tasks else iter(())
+        for path, key, segments, span_count in jobs:
+            if segments is None:
+                segments = [segment for _ in range(span_count) for segment in next(results)]
+                if cache is not None:
+                    cache.put(key, segments)
+            print_segments(path, segments, args)
+
+    elapsed = time.perf_counter() - started
+    cached_note = f", {cache.hits} of {len(jobs)} files from cache" if cache is not None else ""
+    print(f"{audio_seconds / 60:.1f} min of audio in {len(tasks)} spans{cached_note}, scan {planned - started:.2f}s, "
+          f"total {elapsed:.1f}s with {workers} workers ({audio_seconds / elapsed:.1f}x real time)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+
+from audio_buffer import chunk_energy
+from audio_sources import SyntheticSource
+from denoise import StreamingDenoiser
+
+# Benchmarks StreamingDenoiser on synthetic speech mixed with fan noise, mains hum and
+# keyboard clicks: per-chunk cost against the chunk's real-time budget, and how many
+# silent chunks still look like speech to the energy VAD before and after denoising.
+
+
+def office_noise(frames, samplerate, fan_level, click_rate, rng):
+    t = np.arange(frames) / samplerate
+    # Fan: white noise shaped to a low-frequency rumble, plus 50 Hz hum and its harmonic
+    spectrum = np.fft.rfft(rng.normal(0, 1, frames))
+    frequencies = np.fft.rfftfreq(frames, 1 / samplerate)
+    fan = np.fft.irfft(spectrum / (1 + (frequencies / 300) ** 2), n=frames)
+    fan *= fan_level / (np.std(fan) + 1e-9)
+    hum = 0.3 * fan_level * (np.sin(2 * np.pi * 50 * t) + 0.5 * np.sin(2 * np.pi * 100 * t))
+    # Keyboard: short decaying bursts at random times
+    clicks = np.zeros(frames)
+    burst = np.exp(-np.arange(160) / 20.0) * rng.normal(0, 4 * fan_level, 160)
+    for position in rng.integers(0, frames - 160, int(click_rate * frames / samplerate)):
+        clicks[position:position + 160] += burst
+    return fan + hum + clicks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming denoiser")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--fan-level", type=float, default=150.0, help="noise RMS in int16 units")
+    parser.add_argument("--click-rate", type=float, default=3.0, help="keyboard clicks per second")
+    parser.add_argument("--silence-threshold", type=float, default=100.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    script = []
+    while sum(seconds for _, seconds in script) < args.seconds:
+        script += [("silence", rng.uniform(1.0, 4.0)), ("speech", rng.uniform(1.0, 5.0))]
+    source = SyntheticSource(script, samplerate=args.samplerate, speed=None, noise_level=0)
+    frames = int(args.seconds * args.samplerate)
+    with source:
+        clean = source.read(frames)[0].reshape(-1).astype(np.float64)
+    noisy = np.clip(clean + office_noise(len(clean), args.samplerate, args.fan_level, args.click_rate, rng),
+                    -32768, 32767).astype(np.int16)
+
+    # Per-chunk speech/silence ground truth from the script
+    chunk_size = args.samplerate * args.chunk_ms // 1000
+    is_speech = np.zeros(len(noisy) // chunk_size, dtype=bool)
+    for start, end in source.speech_spans():
+        is_speech[int(start * 1000 / args.chunk_ms):int(end * 1000 / args.chunk_ms)] = True
+
+    denoiser = StreamingDenoiser(args.samplerate)
+    delay = denoiser.frame_size
+    costs = []
+    output = []
+    for index in range(len(is_speech)):
+        chunk = noisy[index * chunk_size:(index + 1) * chunk_size].reshape(-1, 1)
+        started = time.perf_counter()
+        output.append(denoiser.process(chunk))
+        costs.append(time.perf_counter() - started)
+    denoised = np.concatenate(output).reshape(-1)[delay:]
+    denoised = np.concatenate((denoised, np.zeros(delay, dtype=np.int16)))
+
+    def spurious(signal):
+        chunks = signal[:len(is_speech) * chunk_size].reshape(-1, chunk_size)
+        energies = np.array([chunk_energy(chunk) for chunk in chunks])
+        return int(np.sum(energies[~is_speech] > args.silence_threshold)), energies
+
+    noisy_spurious, noisy_energy = spurious(noisy)
+    clean_spurious, clean_energy = spurious(denoised)
+    costs_ms = np.array(costs) * 1000
+    print(f"{args.seconds:.0f}s of audio in {len(costs)} chunks of {args.chunk_ms}ms")
+    print(f"per-chunk cost: mean {costs_ms.mean():.2f}ms, p99 {np.percentile(costs_ms, 99):.2f}ms, "
+          f"max {costs_ms.max():.2f}ms (budget {args.chunk_ms}ms)")
+    print(f"real-time factor: {denoiser.realtime_factor():.4f}")
+    print(f"silent chunks above the VAD threshold: {noisy_spurious} noisy -> {clean_spurious} denoised "
+          f"(of {int(np.sum(~is_speech))})")
+    print(f"mean silence energy: {noisy_energy[~is_speech].mean():.0f} -> {clean_energy[~is_speech].mean():.0f}, "
+          f"mean speech energy: {noisy_energy[is_speech].mean():.0f} -> {clean_energy[is_speech].mean():.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+
+import numpy as np
+
+from audio_sources import SyntheticSource
+from dictation_engine import DictationEngine
+from endpointing import AdaptiveEndpointer
+from fake_recognizer import FakeRecognizer
+
+# Speech-end-to-final latency and chopped sentences for fixed and adaptive endpointing.
+# Each synthetic speaker says sentences made of phrases separated by that speaker's
+# mid-sentence pauses, with a long gap after every sentence. A final that arrives before the
+# sentence is over chops it, so the ideal is one final per sentence, as soon as possible.
+
+SPEAKERS = {
+    "fast": (0.1, 0.35),  # Range of mid-sentence pauses, seconds
+    "deliberate": (0.3, 1.1),
+}
+
+
+def speaker_script(pause_range, sentences, rng):
+    script = []
+    for _ in range(sentences):
+        for phrase in range(rng.integers(2, 6)):
+            if phrase:
+                script.append(("silence", rng.uniform(*pause_range)))
+            script.append(("speech", rng.uniform(0.8, 2.5)))
+        script.append(("silence", rng.uniform(3.5, 5.0)))
+    return script
+
+
+def run(script, samplerate, endpoint_silence, max_silence, endpointer):
+    recognizer = FakeRecognizer(samplerate, endpoint_silence=endpoint_silence)
+    engine = DictationEngine(recognizer, samplerate, max_silence_duration=max_silence, endpointer=endpointer)
+    finals = []
+    engine.on_final = lambda text, segment: finals.append(text)
+    with SyntheticSource(script, samplerate, speed=None) as source:
+        while True:
+            audio_chunk = source.read(engine.chunk_size)[0]
+            if len(audio_chunk) == 0:
+                break
+            engine.process_chunk(audio_chunk)
+    engine.finish_utterance()
+    return len(finals), engine.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fixed against adaptive endpointing")
+    parser.add_argument("--sentences", type=int, default=60)
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configs = [
+        # label, recognizer endpoint silence, app silence timeout, endpointer
+        ("fixed 0.5s endpoint", 0.5, 3, lambda: None),
+        ("fixed 3s timeout", 60, 3, lambda: None),
+        ("adaptive", 60, 3, lambda: AdaptiveEndpointer(max_delay=3)),
+    ]
+    for speaker, pause_range in SPEAKERS.items():
+        script = speaker_script(pause_range, args.sentences, np.random.default_rng(args.seed))
+        print(f"{speaker} speaker, {args.sentences} sentences, mid-sentence pauses "
+              f"{pause_range[0]:.2f}-{pause_range[1]:.2f}s")
+        for label, endpoint_silence, max_silence, make_endpointer in configs:
+            finals, stats = run(script, args.samplerate, endpoint_silence, max_silence, make_endpointer())
+            delay = f", learned delay {stats['endpoint_delay']:.2f}s" if "endpoint_delay" in stats else ""
+            print(f"  {label:20s}: {finals:3d} finals ({max(0, finals - args.sentences)} chopped), "
+                  f"speech-end-to-final mean {stats['final_latency_mean']:.2f}s "
+                  f"max {stats['final_latency_max']:.2f}s{delay}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+
+from audio_sources import SyntheticSource, WavFileSource
+from dictation_engine import DictationEngine
+from fake_recognizer import FakeRecognizer
+
+# Partial-result latency over a long monologue, with and without forced segmentation.
+# Chunks go straight through DictationEngine.process_chunk, so the time per chunk is the
+# time from audio being available to its partial being published.
+# By default a FakeRecognizer whose per-chunk cost grows with utterance length stands in for
+# Kaldi's growing lattice; --model and --wav measure a real model on a real recording.
+
+
+def monologue_script(minutes, rng):
+    # Continuous speech with short breaths that are too brief to trigger an endpoint
+    script = []
+    while sum(seconds for _, seconds in script) < minutes * 60:
+        script += [("speech", rng.uniform(3.0, 8.0)), ("silence", rng.uniform(0.1, 0.3))]
+    return script
+
+
+def make_recognizer(args):
+    if args.model:
+        import vosk
+        return vosk.KaldiRecognizer(vosk.Model(args.model), args.samplerate)
+    return FakeRecognizer(args.samplerate, utterance_cost=args.utterance_cost)
+
+
+def run(args, max_utterance_seconds):
+    rng = np.random.default_rng(args.seed)
+    if args.wav:
+        source = WavFileSource(args.wav, args.samplerate)
+    else:
+        source = SyntheticSource(monologue_script(args.minutes, rng), args.samplerate, speed=None)
+    engine = DictationEngine(make_recognizer(args), args.samplerate, max_silence_duration=args.minutes * 60,
+                             max_utterance_seconds=max_utterance_seconds)
+    finals = []
+    engine.on_final = lambda text, segment: finals.append(text)
+
+    latencies = []
+    with source:
+        while True:
+            audio_chunk = source.read(engine.chunk_size)[0]
+            if len(audio_chunk) == 0:
+                break
+            started = time.perf_counter()
+            engine.process_chunk(audio_chunk)
+            latencies.append(time.perf_counter() - started)
+    engine.finish_utterance()
+    return np.array(latencies) * 1000, len(finals), engine.forced_segments
+
+
+def report(label, latencies, finals, forced, chunks_per_minute):
+    print(f"{label}: {finals} finals, {forced} forced cuts")
+    for minute in range(0, len(latencies), chunks_per_minute):
+        window = latencies[minute:minute + chunks_per_minute]
+        print(f"  minute {minute // chunks_per_minute + 1:2d}: mean {window.mean():6.2f}ms  "
+              f"p95 {np.percentile(window, 95):6.2f}ms  max {window.max():6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partial latency with forced segmentation")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--max-utterance", type=float, default=30.0, help="seconds before a forced cut")
+    parser.add_argument("--utterance-cost", type=float, default=2e-5,
+                        help="fake decode cost per chunk per second of utterance, seconds")
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--model", help="path to a Vosk model instead of the fake recognizer")
+    parser.add_argument("--wav", help="16-bit mono WAV to use instead of synthetic speech")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks_per_minute = 600  # 100 ms chunks
+    for label, max_utterance in (("without forced segmentation", None),
+                                 (f"max utterance {args.max_utterance:g}s", args.max_utterance)):
+        latencies, finals, forced = run(args, max_utterance)
+        report(label, latencies, finals, forced, chunks_per_minute)
+
+
+if __name__ == "__main__":
+    main()
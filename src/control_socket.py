@@ -0,0 +1,121 @@
+import os
+import socket
+import tempfile
+import threading
+
+# Local control channel of a running dictation window. The app listens on a Unix socket, and a
+# second launch forwards its command there instead of loading the model again, so a desktop
+# hotkey bound to e.g. `python src/main1.py toggle` acts in milliseconds without a focus change.
+# The protocol is one command line per connection, answered by one line: "ok" or "error <reason>".
+
+REPLY_TIMEOUT = 2.0  # How long the server waits for the app to run a handler
+
+def socket_path():
+    # Per-user runtime directory (tmpfs, mode 0700) where available, else a per-user name in /tmp
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "vosk-dictation.sock")
+    return os.path.join(tempfile.gettempdir(), f"vosk-dictation-{os.getuid()}.sock")
+
+
+def send_command(command, path=None, timeout=REPLY_TIMEOUT + 1.0):
+    # Returns the reply of the running instance, None if there is none. The timeout outlasts the
+    # server's, so a busy app normally answers "error no reply ..." itself.
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path or socket_path())
+            sock.sendall(command.encode() + b"\n")
+            reply = sock.makefile("rb").readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except OSError as e:  # Timeout, reset or permission problem with a running instance
+        return f"error no reply from the running instance: {e or 'timed out'}"
+    if not reply:
+        return "error the running instance closed the connection"
+    return reply.decode().strip()
+
+
+class ControlServer:
+    # Accepts commands on a background thread. handlers maps command names to functions that
+    # return None (success) or raise; run(function) executes a handler where it has to run, for
+    # Tk apps lambda function: root.after(0, function), and the reply waits up to reply_timeout.
+    # Each connection is answered on its own thread, so queued commands do not add up their waits.
+    def __init__(self, handlers, run=None, path=None, reply_timeout=REPLY_TIMEOUT):
+        self.handlers = handlers
+        self.run = run or (lambda function: function())
+        self.path = path or socket_path()
+        self.reply_timeout = reply_timeout
+        self.commands = 0
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        # Raises FileExistsError if another instance is listening; a socket file left behind by a
+        # crashed instance is replaced
+        if send_command("ping", self.path) is not None:
+            raise FileExistsError(f"Another instance is listening on {self.path}")
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # Only this user may connect
+        try:
+            self._sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._sock.listen(8)
+        self._thread = threading.Thread(target=self._serve, name="control", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._sock is None:
+            return
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._sock.accept()
+            except OSError:
+                return  # Closed
+            threading.Thread(target=self._answer, args=(connection,), name="control-client", daemon=True).start()
+
+    def _answer(self, connection):
+        with connection:
+            connection.settimeout(self.reply_timeout)
+            try:
+                command = connection.makefile("rb").readline().decode().strip()
+                connection.sendall(self._handle(command).encode() + b"\n")
+            except OSError:
+                pass
+
+    def _handle(self, command):
+        if command == "ping":
+            return "ok"
+        handler = self.handlers.get(command)
+        if handler is None:
+            return f"error unknown command '{command}', expected one of {', '.join(sorted(self.handlers))}"
+        self.commands += 1
+        done = threading.Event()
+        outcome = []
+
+        def call():
+            try:
+                handler()
+                outcome.append("ok")
+            except Exception as e:
+                outcome.append(f"error {e}")
+            done.set()
+
+        self.run(call)
+        if not done.wait(self.reply_timeout):
+            return "error no reply from the application"
+        return outcome[0]
@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+
+
+class StreamingDenoiser:
+    # Wiener-style spectral gate for steady background noise (fans, hum, room tone).
+    # Audio is cut into frame_size windows at 50% overlap, each frame's spectrum is scaled by
+    # a per-bin gain from the tracked noise floor, and frames are overlap-added back. All frames
+    # available in a chunk go through one batched rfft/irfft. Output has the same length as the
+    # input, delayed by frame_size samples (32 ms at 16 kHz with the defaults).
+    def __init__(self, samplerate=16000, frame_size=512, gain_floor=0.1, over_subtraction=1.5,
+                 noise_rise=0.995, noise_fall=0.9, gain_smoothing=0.5):
+        if frame_size % 2:
+            raise ValueError("frame_size must be even")
+        self.samplerate = samplerate
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.gain_floor = gain_floor  # Never attenuate more than this (0.1 = -20 dB), limits musical noise
+        self.over_subtraction = over_subtraction
+        self.noise_rise = noise_rise  # Slow tracking when the noise floor goes up (speech must not leak in)
+        self.noise_fall = noise_fall  # Fast tracking when it goes down
+        self.gain_smoothing = gain_smoothing
+
+        # sqrt-Hann analysis and synthesis windows sum to one at 50% overlap
+        self.window = np.sqrt(np.hanning(frame_size + 1)[:-1])
+        self.reset()
+
+    def reset(self):
+        self._input = np.zeros(self.frame_size - self.hop, dtype=np.float64)
+        self._overlap = np.zeros(self.frame_size - self.hop, dtype=np.float64)
+        self._output = np.zeros(self.hop, dtype=np.float64)  # Finished samples not yet returned
+        self._noise = None
+        self._gain = np.ones(self.frame_size // 2 + 1)
+        self.chunks_processed = 0
+        self.audio_seconds = 0.0
+        self.processing_seconds = 0.0
+
+    def process(self, audio_chunk):
+        started = time.perf_counter()
+        samples = audio_chunk.reshape(-1).astype(np.float64)
+        self._input = np.concatenate((self._input, samples))
+
+        frame_count = (len(self._input) - (self.frame_size - self.hop)) // self.hop
+        if frame_count > 0:
+            frames = np.lib.stride_tricks.sliding_window_view(self._input, self.frame_size)[::self.hop][:frame_count]
+            spectra = np.fft.rfft(frames * self.window, axis=1)
+            power = spectra.real ** 2 + spectra.imag ** 2
+            gains = self._gains(power)
+            cleaned = np.fft.irfft(spectra * gains, n=self.frame_size, axis=1) * self.window
+            self._output = np.concatenate((self._output, self._overlap_add(cleaned)))
+            self._input = self._input[frame_count * self.hop:]
+
+        output, self._output = self._output[:len(samples)], self._output[len(samples):]
+        self.chunks_processed += 1
+        self.audio_seconds += len(samples) / self.samplerate
+        self.processing_seconds += time.perf_counter() - started
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16).reshape(audio_chunk.shape)
+
+    def _gains(self, power):
+        # The noise floor recursion runs frame by frame; everything else is vectorized per frame
+        if self._noise is None:
+            self._noise = power[0].copy() + 1e-9
+        gains = np.empty_like(power)
+        for index, frame_power in enumerate(power):
+            rate = np.where(frame_power > self._noise, self.noise_rise, self.noise_fall)
+            self._noise = rate * self._noise + (1 - rate) * frame_power
+            # Wiener gain from the a posteriori SNR, with over-subtraction and a floor
+            snr = np.maximum(frame_power / self._noise - self.over_subtraction, 0.0)
+            gain = np.maximum(snr / (snr + 1.0), self.gain_floor)
+            self._gain = self.gain_smoothing * self._gain + (1 - self.gain_smoothing) * gain
+            gains[index] = self._gain
+        return gains
+
+    def _overlap_add(self, cleaned):
+        # Each frame completes one hop of output; its tail waits for the next frame
+        finished = np.empty(len(cleaned) * self.hop)
+        overlap = self._overlap
+        for index, frame in enumerate(cleaned):
+            finished[index * self.hop:(index + 1) * self.hop] = overlap + frame[:self.hop]
+            overlap = frame[self.hop:]
+        self._overlap = overlap
+        return finished
+
+    def realtime_factor(self):
+        # Processing time per second of audio; must stay well below 1
+        return self.processing_seconds / self.audio_seconds if self.audio_seconds else 0.0
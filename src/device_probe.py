@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import socket
+import time
+
+# Finds the input device and host API (ALSA, PulseAudio/PipeWire, JACK, ...) with the lowest
+# achievable capture latency. Each device is opened with latency="low" at increasing blocksizes;
+# the smallest blocksize that runs for probe_seconds without an overflow is its stable blocksize,
+# and the stream's reported latency plus one block is the latency the recognizer would see.
+# The winner is remembered per machine (keyed by hostname, the cache may be on a shared home) and
+# stored as "device name, host API" rather than an index, which changes when devices come and go.
+#
+#   python device_probe.py            probe every input device and remember the best one
+#   python device_probe.py --list     only list input devices
+
+CHOICE_PATH = "~/.cache/vosk-dictation/input_device.json"
+PROBE_BLOCKSIZES = (160, 320, 480, 800, 1600)  # 10 to 100 ms at 16 kHz
+
+
+def list_input_devices():
+    import sounddevice as sd  # Imported lazily like in audio_sources
+    hostapis = sd.query_hostapis()
+    devices = []
+    for index, info in enumerate(sd.query_devices()):
+        if info["max_input_channels"] > 0:
+            hostapi = hostapis[info["hostapi"]]["name"]
+            devices.append({
+                "index": index,
+                "name": info["name"],
+                "hostapi": hostapi,
+                "device": f"{info['name']}, {hostapi}",  # sounddevice accepts this as a device selector
+                "default_low_latency": info["default_low_input_latency"],
+            })
+    return devices
+
+
+def probe_device(device, samplerate=16000, blocksizes=PROBE_BLOCKSIZES, probe_seconds=1.0):
+    # Returns the probe result for the smallest stable blocksize, or a result with "error" set
+    import sounddevice as sd
+    error = "overflows at every blocksize"
+    for blocksize in blocksizes:
+        try:
+            with sd.InputStream(device=device, samplerate=samplerate, channels=1, dtype="int16",
+                                blocksize=blocksize, latency="low") as stream:
+                reported_latency = stream.latency
+                overflows = 0
+                intervals = []
+                last = time.perf_counter()
+                for _ in range(max(1, int(probe_seconds * samplerate / blocksize))):
+                    overflows += bool(stream.read(blocksize)[1])
+                    now = time.perf_counter()
+                    intervals.append(now - last)
+                    last = now
+        except (sd.PortAudioError, ValueError) as e:
+            return {"device": device, "error": str(e)}
+        if overflows:
+            continue
+        block_seconds = blocksize / samplerate
+        return {
+            "device": device,
+            "blocksize": blocksize,
+            "latency": reported_latency,
+            "total_latency": reported_latency + block_seconds,
+            "jitter_ms": (max(intervals[1:] or intervals) - block_seconds) * 1000,
+        }
+    return {"device": device, "error": error}
+
+
+def probe_all(samplerate=16000, probe_seconds=1.0, log=print):
+    results = []
+    for info in list_input_devices():
+        result = probe_device(info["device"], samplerate, probe_seconds=probe_seconds)
+        if log:
+            if "error" in result:
+                log(f"  {info['device']}: unusable ({result['error']})")
+            else:
+                log(f"  {info['device']}: {result['total_latency'] * 1000:.0f} ms "
+                    f"(blocksize {result['blocksize']}, jitter {result['jitter_ms']:.1f} ms)")
+        results.append(result)
+    return results
+
+
+def best_result(results):
+    usable = [result for result in results if "error" not in result]
+    return min(usable, key=lambda result: result["total_latency"]) if usable else None
+
+
+def load_choices(path=CHOICE_PATH):
+    try:
+        with open(os.path.expanduser(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def remembered_input(path=CHOICE_PATH):
+    # MicrophoneSource keyword arguments for the device probed on this machine, {} if none
+    choice = load_choices(path).get(socket.gethostname())
+    if not choice:
+        return {}
+    return {"device": choice["device"], "blocksize": choice["blocksize"], "latency": "low"}
+
+
+def remember(result, path=CHOICE_PATH):
+    path = os.path.expanduser(path)
+    choices = load_choices(path)
+    choices[socket.gethostname()] = dict(result, probed=time.strftime("%Y-%m-%d %H:%M:%S"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(choices, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the lowest-latency audio input device")
+    parser.add_argument("--list", action="store_true", help="only list input devices")
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--seconds", type=float, default=1.0, help="probe duration per device and blocksize")
+    args = parser.parse_args()
+
+    if args.list:
+        for info in list_input_devices():
+            print(f"{info['index']:3d}  {info['device']}  (default low latency {info['default_low_latency'] * 1000:.0f} ms)")
+        return
+    print("Probing input devices...")
+    best = best_result(probe_all(args.samplerate, args.seconds))
+    if best is None:
+        print("No usable input device found")
+        return
+    remember(best)
+    print(f"Using {best['device']}: {best['total_latency'] * 1000:.0f} ms, blocksize {best['blocksize']}")
+
+
+if __name__ == "__main__":
+    main()
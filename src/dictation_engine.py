@@ -0,0 +1,554 @@
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+from audio_buffer import QUEUE_POLICIES, BoundedAudioQueue, chunk_energy
+from audio_sources import MicrophoneSource
+from stage_graph import Pipeline, Stage
+from word_store import WordStore
+
+
+def default_source_factory(samplerate):
+    return MicrophoneSource(samplerate)
+
+
+RECONFIGURABLE = ("recognizer", "silence_threshold", "max_silence_duration", "chunk_duration", "queue_max_chunks",
+                  "queue_policy", "lag_warning_seconds", "max_utterance_seconds", "denoiser", "endpointer", "noise_filter",
+                  "partial_interval")
+
+
+class DictationEngine:
+    # The audio pipeline shared by the Tk apps and the tools, as a chain of stages (stage_graph):
+    #
+    #   capture -> audio_queue -> [stages] -> [denoise] -> VAD + recognizer + segmentation
+    #           -> events -> [post_processors] -> callbacks
+    #
+    # Any object with the vosk.KaldiRecognizer methods (AcceptWaveform, Result, PartialResult,
+    # FinalResult, SetWords) can be the recognizer, and source_factory(samplerate) can return
+    # any audio source from audio_sources. stages are extra (name, process(chunk)) steps, e.g.
+    # resampling or gain, and an optional denoiser (denoise.StreamingDenoiser) cleans each chunk
+    # before VAD and recognition; each of them runs on its own thread with a bounded queue, so
+    # they overlap with recognition of the previous chunk. Recognition runs on the processing
+    # thread; it alone keeps the utterance state. Partials, finals and lag reports are handed to
+    # the events stage, which runs post_processors (process(text, segment) -> text, "" drops the
+    # final) and the callbacks in order, so a slow consumer never stalls the recognizer.
+    # stats()["stages"] has items, busy time and queue depth per stage.
+    #
+    # If max_utterance_seconds is set, an utterance that never reaches an endpoint (continuous
+    # talking, noise above the VAD threshold) is cut at the quietest chunk of the last
+    # cut_search_seconds: everything up to the cut is finalized and the audio after it is fed
+    # again to the reset recognizer, so its lattice, and with it partial latency, stays bounded.
+    #
+    # An optional endpointer (endpointing.AdaptiveEndpointer) learns the speaker's mid-utterance
+    # pauses and sets both the recognizer's endpointer delays and max_silence_duration from them.
+    # Either way the engine measures speech-end-to-final latency, in seconds of audio, for stats().
+    #
+    # An optional noise_filter (noise_filter.NoiseWordFilter) removes low-confidence words the
+    # recognizer produced from noise, judged by word confidence and the chunk energy under each
+    # word, and holds back partials of utterances that have no speech chunk yet.
+    #
+    # stop() ends capture at once: the chunk being read is abandoned, and the processing thread
+    # decodes whatever is still queued with a single AcceptWaveform (no partials), takes
+    # FinalResult and reports the stop-to-final time in stats().
+    #
+    # partial_interval asks for a partial at most once per that many seconds of audio instead of
+    # after every chunk; resource_governor raises it when the host runs out of CPU.
+    #
+    # configure() changes settings of a running engine (see RECONFIGURABLE); the processing
+    # thread picks them up between chunks, and a new recognizer only between utterances, so the
+    # utterance in progress is finished by the recognizer that started it.
+    #
+    # Callbacks run on the events thread (on_error on the capture thread); Tk users should hand
+    # them to root.after.
+    #   on_partial(text)                 - the partial hypothesis changed
+    #   on_final(text, segment)          - a segment was finalized; segment indexes word_store or is None
+    #   on_lag(falling_behind, seconds)  - the queue backlog crossed the warning threshold
+    #   on_stopped(stats)                - the session ended and all queued audio was processed
+    #   on_error(exception)              - the capture thread failed
+    def __init__(self, recognizer, samplerate=16000, chunk_duration=0.1, source_factory=None,
+                 silence_threshold=100, max_silence_duration=3, queue_max_chunks=50,
+                 queue_policy="skip_silence", lag_warning_seconds=1.5, word_store=None, denoiser=None,
+                 max_utterance_seconds=None, cut_search_seconds=2.0, endpointer=None, noise_filter=None,
+                 stages=(), post_processors=(), partial_interval=0.0):
+        self.recognizer = recognizer
+        self.recognizer.SetWords(True)  # Include per-word timings and confidences in final results
+        self.samplerate = samplerate
+        self.chunk_duration = chunk_duration
+        self.chunk_size = int(samplerate * chunk_duration)
+        self.cut_search_seconds = cut_search_seconds
+        self.source_factory = source_factory or default_source_factory
+        self.silence_threshold = silence_threshold
+        self.max_silence_duration = max_silence_duration
+        self.lag_warning_seconds = lag_warning_seconds
+        self.audio_queue = BoundedAudioQueue(maxsize=queue_max_chunks, policy=queue_policy,
+                                             silence_threshold=silence_threshold, chunk_duration=chunk_duration)
+        self.word_store = word_store if word_store is not None else WordStore()
+        self.denoiser = denoiser
+        self.max_utterance_seconds = max_utterance_seconds
+        self.recent_chunks = deque(maxlen=max(1, math.ceil(cut_search_seconds / chunk_duration)))
+        self.endpointer = endpointer
+        self.final_latencies = deque(maxlen=200)
+        self.noise_filter = noise_filter
+        self.partial_interval = partial_interval  # Audio seconds between PartialResult calls, 0 = every chunk
+        self.last_partial_seconds = 0.0
+        self.stop_requested_at = None
+        self.stop_to_final_seconds = None
+        self.flushed_chunks = 0
+        self.stages = list(stages)
+        self.post_processors = list(post_processors)
+        self.input = self.audio_queue  # What the processing thread reads: the last pre-recognition stage
+        self.pipeline = None
+        self.events = None
+        self.event_stage = None
+        self.inline_denoise = True  # The denoiser runs on the processing thread, not in its own stage
+        self.recognize_seconds = 0.0
+        self.utterance_energies = deque(maxlen=6000)  # (recognizer clock at chunk end, energy), 10 minutes at 100 ms
+        self.utterance_has_speech = False
+
+        self.is_recording = False
+        self.falling_behind = False
+        self.last_speech_time = time.time()
+        self.chunks_processed = 0
+        self.forced_segments = 0
+        self.refed_chunks = 0
+        self.recognizer_seconds = 0.0  # Audio fed to the recognizer so far, the clock of its word timings
+        self.refed_seconds = 0.0  # Audio fed twice after forced cuts, subtracted from word timings
+        self.speech_end_seconds = 0.0  # Recognizer clock at the end of the last speech chunk
+        self.current_text = ""
+        self.silence_counter = 0
+        self.utterance_seconds = 0.0
+        self.recording_thread = None
+        self.processing_thread = None
+
+        self.on_partial = None
+        self.on_final = None
+        self.on_lag = None
+        self.on_stopped = None
+        self.on_error = None
+        self._pending_settings = {}
+        self._settings_lock = threading.Lock()
+        self.apply_endpointing()
+
+    def start(self):
+        # A previous session may still be draining its queue; let it finish with the recognizer first.
+        # A UI thread must not get here while is_busy(): the threads joined here may be waiting
+        # for it to accept their callbacks. Poll is_busy() from the UI's event loop instead.
+        self.wait()
+        self.apply_pending_settings()
+        if self.recognizer is None:
+            raise RuntimeError("No recognizer loaded")
+        self.audio_queue.clear()
+        self.stop_requested_at = self.stop_to_final_seconds = None
+        if self.denoiser is not None:
+            self.denoiser.reset()
+        self.is_recording = True
+
+        steps = list(self.stages)
+        self.inline_denoise = self.denoiser is None  # One enabled later in the session runs inline
+        if self.denoiser is not None:
+            steps.append(("denoise", lambda chunk: self.denoiser.process(chunk) if self.denoiser is not None else chunk))
+        # One chunk per stage queue: a stage that falls behind blocks on its output and the backlog
+        # stays in audio_queue, where lag_seconds(), queue_max_chunks and the overload policy see it
+        self.pipeline = Pipeline(self.audio_queue, steps, maxsize=1, on_error=self.report_error).start()
+        self.input = self.pipeline
+        # Unbounded, so a slow callback (or a UI thread busy elsewhere) never stalls recognition
+        self.events = queue.Queue()
+        self.event_stage = Stage("events", self.deliver_event, self.events, terminal=True, on_error=self.report_error).start()
+
+        self.recording_thread = threading.Thread(target=self.record_audio, name="capture")
+        self.recording_thread.daemon = True
+        self.recording_thread.start()
+
+        self.processing_thread = threading.Thread(target=self.process_audio, name="processing")
+        self.processing_thread.daemon = True
+        self.processing_thread.start()
+
+    def release_recognizer(self):
+        # Drops the recognizer between sessions so its model can be freed; configure(recognizer=...)
+        # sets a new one before the next start()
+        if self.is_busy():
+            raise RuntimeError("Cannot release the recognizer while a session is running")
+        with self._settings_lock:
+            self._pending_settings.pop("recognizer", None)
+        self.recognizer = None
+
+    def stop(self):
+        # The sentinel goes in right away, so processing flushes the queue without waiting for the
+        # capture thread's current read, whose audio is from after the stop anyway
+        if self.is_recording:
+            self.stop_requested_at = time.perf_counter()
+            self.is_recording = False
+            self.audio_queue.put(None)
+
+    def wait(self, timeout=None):
+        # The capture thread can outlive processing by one read after stop(); the events thread
+        # returns once on_stopped was delivered
+        threads = [self.processing_thread, self.recording_thread]
+        if self.event_stage is not None:
+            threads.append(self.event_stage.thread)
+        if self.pipeline is not None:
+            threads += [stage.thread for stage in self.pipeline.stages]
+        for thread in threads:
+            if thread is not None:
+                thread.join(timeout)
+        return not any(thread is not None and thread.is_alive() for thread in threads)
+
+    def is_busy(self):
+        # True until every thread of the last session has ended, including the events thread that
+        # is still delivering on_stopped after processing finished
+        threads = [self.processing_thread, self.recording_thread]
+        if self.event_stage is not None:
+            threads.append(self.event_stage.thread)
+        if self.pipeline is not None:
+            threads += [stage.thread for stage in self.pipeline.stages]
+        return any(thread is not None and thread.is_alive() for thread in threads)
+
+    def record_audio(self):
+        try:
+            with self.source_factory(self.samplerate) as source:
+                while self.is_recording:
+                    audio_chunk = source.read(self.chunk_size)[0]
+                    if self.stop_requested_at is not None:
+                        break  # The read ended after stop(), its audio is from after the Stop press
+                    if len(audio_chunk):
+                        self.audio_queue.put(audio_chunk)
+                    if len(audio_chunk) < self.chunk_size:
+                        break  # End of a finite source
+        except Exception as e:
+            self.report_error(e)
+        finally:
+            self.is_recording = False
+            if self.stop_requested_at is None:
+                self.audio_queue.put(None)  # End-of-stream sentinel for the processing thread; stop() puts its own
+
+    def process_audio(self):
+        self.silence_counter = 0
+        while True:
+            audio_chunk = self.input.get()
+            if audio_chunk is None:
+                break
+            if self.stop_requested_at is not None:
+                self.flush_backlog(audio_chunk)
+                break
+            started = time.perf_counter()
+            self.chunks_processed += 1
+            if self._pending_settings:
+                self.apply_pending_settings()
+            self.update_lag_status()
+            if self.denoiser is not None and self.inline_denoise:
+                audio_chunk = self.denoiser.process(audio_chunk)
+            self.process_chunk(audio_chunk)
+            self.recognize_seconds += time.perf_counter() - started
+
+        # Flush whatever the recognizer still holds from the end of the session
+        self.finish_utterance()
+        if self.stop_requested_at is not None:
+            self.stop_to_final_seconds = time.perf_counter() - self.stop_requested_at
+        self.falling_behind = False
+        self.emit("stopped", self.stats())
+        self.events.put(None)  # Ends the events thread after on_stopped
+
+    def emit(self, kind, *args):
+        # Hand an event to the events thread; outside a session (a recognizer swap while idle
+        # finishing an utterance) it is delivered right away
+        if self.event_stage is not None and self.event_stage.is_alive():
+            self.events.put((kind, args))
+        else:
+            self.deliver_event((kind, args))
+
+    def deliver_event(self, event):
+        kind, args = event
+        if kind == "final":
+            text, segment = args
+            for post_process in self.post_processors:
+                text = post_process(text, segment)
+                if not text:
+                    return
+            if self.on_final:
+                self.on_final(text, segment)
+        elif kind == "partial":
+            if self.on_partial:
+                self.on_partial(*args)
+        elif kind == "lag":
+            if self.on_lag:
+                self.on_lag(*args)
+        elif kind == "stopped":
+            if self.on_stopped:
+                self.on_stopped(*args)
+
+    def report_error(self, e):
+        if self.on_error:
+            self.on_error(e)
+
+    def flush_backlog(self, audio_chunk):
+        # After stop(): decode everything still queued in one AcceptWaveform call. Nobody waits for
+        # partials any more, so the per-chunk PartialResult, VAD and lag work is skipped; the
+        # clocks and chunk energies are still kept for word timings and the noise filter.
+        # stop() queued the sentinel behind the backlog, so reading up to it takes everything,
+        # including chunks still inside the pre-recognition stages
+        chunks = [audio_chunk]
+        while True:
+            chunk = self.input.get()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        if self._pending_settings:
+            self.apply_pending_settings()
+        if self.denoiser is not None and self.inline_denoise:
+            chunks = [self.denoiser.process(chunk) for chunk in chunks]
+        for chunk in chunks:
+            energy = chunk_energy(chunk)
+            seconds = len(chunk) / self.samplerate
+            self.recognizer_seconds += seconds
+            self.utterance_seconds += seconds
+            self.utterance_energies.append((self.recognizer_seconds, energy))
+            if energy > self.silence_threshold:
+                self.utterance_has_speech = True
+                self.speech_end_seconds = self.recognizer_seconds
+        self.chunks_processed += len(chunks)
+        self.flushed_chunks += len(chunks)
+        if self.recognizer.AcceptWaveform(b"".join(chunk.tobytes() for chunk in chunks)):
+            self.emit_final(json.loads(self.recognizer.Result()))
+            self.reset_utterance()
+
+    def speculative_text(self):
+        # The latest partial, for a caller that wants something on the clipboard before the final
+        # arrives; empty while the utterance is still noise only
+        if self.noise_filter is not None and not self.utterance_has_speech:
+            return ""
+        return self.current_text
+
+    def configure(self, **settings):
+        unknown = set(settings) - set(RECONFIGURABLE)
+        if unknown:
+            raise ValueError(f"Settings that cannot be changed at run time: {sorted(unknown)}")
+        # Validate here, a bad value must not take down the processing thread
+        if settings.get("queue_policy", QUEUE_POLICIES[0]) not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{settings['queue_policy']}', expected one of {QUEUE_POLICIES}")
+        if settings.get("queue_max_chunks", 1) < 1:
+            raise ValueError("queue_max_chunks must be at least 1")
+        if settings.get("chunk_duration", 0.1) <= 0:
+            raise ValueError("chunk_duration must be positive")
+        with self._settings_lock:
+            self._pending_settings.update(settings)
+        if not self.is_busy():
+            self.apply_pending_settings()
+
+    def apply_pending_settings(self):
+        # Runs on the processing thread, or on the caller's thread while no session is active
+        with self._settings_lock:
+            settings, self._pending_settings = self._pending_settings, {}
+            if "recognizer" in settings and self.current_text and self.is_busy():
+                self._pending_settings["recognizer"] = settings.pop("recognizer")
+        if "recognizer" in settings:
+            if self.current_text:
+                self.finish_utterance()
+            self.recognizer = settings["recognizer"]
+            self.recognizer.SetWords(True)
+            self.recognizer_seconds = self.refed_seconds = self.speech_end_seconds = self.last_partial_seconds = 0.0
+            self.reset_utterance()
+            if self.endpointer is not None:
+                self.endpointer.changed = True
+        if "endpointer" in settings:
+            self.endpointer = settings["endpointer"]
+        if "max_silence_duration" in settings:
+            if self.endpointer is not None:
+                self.endpointer.max_delay = settings["max_silence_duration"]
+                self.endpointer.delay = min(self.endpointer.delay, self.endpointer.max_delay)
+                self.endpointer.changed = True
+            else:
+                self.max_silence_duration = settings["max_silence_duration"]
+        if "denoiser" in settings:
+            self.denoiser = settings["denoiser"]
+        if "noise_filter" in settings:
+            self.noise_filter = settings["noise_filter"]
+        if "partial_interval" in settings:
+            self.partial_interval = settings["partial_interval"]
+        if "silence_threshold" in settings:
+            self.silence_threshold = settings["silence_threshold"]
+            self.audio_queue.reconfigure(silence_threshold=self.silence_threshold)
+        if "chunk_duration" in settings:
+            # The capture thread reads chunk_size for every block, so the next read has the new size
+            self.silence_counter = round(self.silence_counter * self.chunk_duration / settings["chunk_duration"])
+            self.chunk_duration = settings["chunk_duration"]
+            self.chunk_size = int(self.samplerate * self.chunk_duration)
+            self.recent_chunks = deque(self.recent_chunks,
+                                       maxlen=max(1, math.ceil(self.cut_search_seconds / self.chunk_duration)))
+            self.audio_queue.reconfigure(chunk_duration=self.chunk_duration)
+        if "queue_max_chunks" in settings or "queue_policy" in settings:
+            self.audio_queue.reconfigure(maxsize=settings.get("queue_max_chunks"), policy=settings.get("queue_policy"))
+        if "lag_warning_seconds" in settings:
+            self.lag_warning_seconds = settings["lag_warning_seconds"]
+        if "max_utterance_seconds" in settings:
+            self.max_utterance_seconds = settings["max_utterance_seconds"]
+        self.apply_endpointing()
+
+    def process_chunk(self, audio_chunk):
+        # Check if there's speech in this chunk
+        energy = chunk_energy(audio_chunk)
+        if energy > self.silence_threshold:
+            if self.silence_counter and self.current_text and self.endpointer is not None:
+                # Speech resumed before the utterance ended: a mid-utterance pause
+                self.endpointer.observe_pause(self.silence_counter * self.chunk_size / self.samplerate)
+            self.silence_counter = 0
+            self.last_speech_time = time.time()
+            self.speech_end_seconds = self.recognizer_seconds + len(audio_chunk) / self.samplerate
+        else:
+            self.silence_counter += 1
+
+        self.recognize(audio_chunk, energy)
+
+        # Finalize the pending utterance once silence exceeds the threshold
+        silence_duration = self.silence_counter * self.chunk_size / self.samplerate
+        if silence_duration > self.max_silence_duration:
+            if self.current_text:
+                self.record_final_latency()
+                self.finish_utterance()
+            self.silence_counter = 0
+
+        if self.max_utterance_seconds and self.utterance_seconds >= self.max_utterance_seconds and self.current_text:
+            self.force_segment()
+
+    def recognize(self, audio_chunk, energy):
+        seconds = len(audio_chunk) / self.samplerate
+        self.recognizer_seconds += seconds
+        self.utterance_seconds += seconds
+        self.recent_chunks.append((audio_chunk, energy, self.recognizer_seconds))
+        self.utterance_energies.append((self.recognizer_seconds, energy))
+        if energy > self.silence_threshold:
+            self.utterance_has_speech = True
+
+        if self.recognizer.AcceptWaveform(audio_chunk.tobytes()):
+            self.record_final_latency()
+            self.emit_final(json.loads(self.recognizer.Result()))
+            self.reset_utterance()
+            self.silence_counter = 0
+        elif self.recognizer_seconds - self.last_partial_seconds >= self.partial_interval:
+            # PartialResult walks the whole lattice, the most expensive call after decoding itself
+            self.last_partial_seconds = self.recognizer_seconds
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            if partial and partial != self.current_text:
+                self.current_text = partial
+                if self.noise_filter is not None and not self.utterance_has_speech:
+                    self.noise_filter.suppressed_partials += 1  # Nothing but noise so far
+                else:
+                    self.emit("partial", partial)
+
+    def finish_utterance(self):
+        # FinalResult also resets the recognizer, so the same words are not reported again by a later Result()
+        self.emit_final(json.loads(self.recognizer.FinalResult()), self.current_text)
+        self.reset_utterance()
+
+    def reset_utterance(self):
+        self.current_text = ""
+        self.utterance_seconds = 0.0
+        self.recent_chunks.clear()
+        self.utterance_energies.clear()
+        self.utterance_has_speech = False
+        self.apply_endpointing()
+
+    def apply_endpointing(self):
+        # Delays only change between utterances, so a segment is never judged by two rules
+        if self.endpointer is not None and self.endpointer.changed:
+            self.endpointer.apply(self.recognizer)
+            self.max_silence_duration = self.endpointer.silence_timeout()
+
+    def record_final_latency(self):
+        self.final_latencies.append(max(0.0, self.recognizer_seconds - self.speech_end_seconds))
+
+    def force_segment(self):
+        recent = list(self.recent_chunks)
+        quietest = min(range(len(recent)), key=lambda index: recent[index][1])
+        cut_time = recent[quietest][2]  # Recognizer clock at the end of the quietest chunk
+
+        result = json.loads(self.recognizer.FinalResult())
+        refeed = []
+        words = result.get("result")
+        if words:
+            kept = [word for word in words if (word["start"] + word["end"]) / 2 < cut_time]
+            if len(kept) < len(words):
+                # Resume after the last kept word so no part of it is decoded twice
+                resume_time = max([cut_time] + [word["end"] for word in kept])
+                refeed = [(chunk, energy) for chunk, energy, end_time in recent
+                          if end_time - len(chunk) / self.samplerate >= resume_time - 1e-6]
+                result = {"text": " ".join(word["word"] for word in kept), "result": kept}
+
+        self.forced_segments += 1
+        self.emit_final(result)
+        self.reset_utterance()
+        for chunk, energy in refeed:
+            self.refed_chunks += 1
+            self.refed_seconds += len(chunk) / self.samplerate
+            self.recognize(chunk, energy)
+
+    def word_energies(self, words):
+        # Peak chunk energy under each word, inf where the chunks are no longer known
+        energies = []
+        for word in words:
+            peak = max((energy for end_time, energy in self.utterance_energies
+                        if end_time > word["start"] and end_time - self.chunk_duration < word["end"]), default=math.inf)
+            energies.append(peak)
+        return energies
+
+    def emit_final(self, result, fallback_text=""):
+        if self.noise_filter is not None:
+            if result.get("result"):
+                result = self.noise_filter.filter(result, self.word_energies(result["result"]), self.silence_threshold)
+                if result is None:
+                    return
+            elif not result.get("text") and not self.utterance_has_speech:
+                if fallback_text:
+                    self.noise_filter.dropped_segments += 1  # Only the partial of a noise-only utterance is left
+                return
+        text = result.get("text", "")
+        segment = None
+        if text:
+            if self.refed_seconds and result.get("result"):
+                # Undo the clock skew from audio that was fed twice after forced cuts
+                result = dict(result, result=[dict(word, start=word["start"] - self.refed_seconds,
+                                                   end=word["end"] - self.refed_seconds)
+                                              for word in result["result"]])
+            segment = self.word_store.add_result(result)
+        else:
+            text = fallback_text
+        if text:
+            self.emit("final", text, segment)
+
+    def update_lag_status(self):
+        # Only report transitions so the UI is not touched for every chunk
+        lag = self.audio_queue.lag_seconds()
+        if lag > self.lag_warning_seconds and not self.falling_behind:
+            self.falling_behind = True
+        elif lag <= self.lag_warning_seconds / 2 and self.falling_behind:
+            self.falling_behind = False
+        else:
+            return
+        self.emit("lag", self.falling_behind, lag)
+
+    def stats(self):
+        stats = self.audio_queue.stats()
+        stats["processed"] = self.chunks_processed
+        stats["forced_segments"] = self.forced_segments
+        stats["refed"] = self.refed_chunks
+        stats["flushed"] = self.flushed_chunks
+        stages = self.pipeline.stats() if self.pipeline is not None else {}
+        stages["recognize"] = {"items": self.chunks_processed, "busy_seconds": self.recognize_seconds,
+                               "mean_ms": self.recognize_seconds / self.chunks_processed * 1000 if self.chunks_processed else 0.0}
+        if self.event_stage is not None:
+            stages["events"] = self.event_stage.stats()
+        stats["stages"] = stages
+        if self.stop_to_final_seconds is not None:
+            stats["stop_to_final_seconds"] = self.stop_to_final_seconds
+        if self.final_latencies:
+            stats["final_latency_mean"] = sum(self.final_latencies) / len(self.final_latencies)
+            stats["final_latency_max"] = max(self.final_latencies)
+        if self.endpointer is not None:
+            stats.update(self.endpointer.stats())
+        if self.noise_filter is not None:
+            stats.update(self.noise_filter.stats())
+        if self.denoiser is not None:
+            stats["denoise_realtime_factor"] = self.denoiser.realtime_factor()
+        return stats
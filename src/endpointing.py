@@ -0,0 +1,55 @@
+from collections import deque
+
+import numpy as np
+
+
+class AdaptiveEndpointer:
+    # Learns how long this speaker pauses inside an utterance and derives the endpoint delay
+    # from it: the silence that ends a segment is margin times the pause_percentile of recent
+    # mid-utterance pauses, clamped to [min_delay, max_delay]. Fast talkers with short pauses get
+    # finals sooner; a speaker who stops to think mid-sentence keeps the sentence together.
+    #
+    # The engine reports every pause that speech resumed after (observe_pause). Until
+    # min_pauses have been seen, initial_delay is used; it defaults to max_delay, so enabling
+    # adaptive endpointing never shortens the configured silence timeout before anything was
+    # learned, and the learner gets to see pauses up to the full timeout.
+    def __init__(self, initial_delay=None, min_delay=0.4, max_delay=3.0, pause_percentile=95, margin=1.25,
+                 window=200, min_pauses=20, start_timeout=5.0, max_utterance=30.0):
+        self.initial_delay = max_delay if initial_delay is None else initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.pause_percentile = pause_percentile
+        self.margin = margin
+        self.min_pauses = min_pauses
+        self.start_timeout = start_timeout  # Vosk t_start_max: silence before any speech
+        self.max_utterance = max_utterance  # Vosk t_max
+        self.pauses = deque(maxlen=window)
+        self.delay = self.initial_delay
+        self.changed = True  # Delays not yet applied to the recognizer
+
+    def observe_pause(self, seconds):
+        # Pauses longer than max_delay would have ended the segment, they are not mid-utterance
+        if seconds <= 0 or seconds > self.max_delay:
+            return
+        self.pauses.append(seconds)
+        if len(self.pauses) < self.min_pauses:
+            return
+        delay = float(np.percentile(self.pauses, self.pause_percentile)) * self.margin
+        delay = round(min(self.max_delay, max(self.min_delay, delay)), 2)
+        if delay != self.delay:
+            self.delay = delay
+            self.changed = True
+
+    def silence_timeout(self):
+        # The app's own timeout, a backstop for when the recognizer's endpointer does not fire
+        return self.delay
+
+    def apply(self, recognizer):
+        # vosk.KaldiRecognizer.SetEndpointerDelays needs vosk 0.3.45 or newer; with older
+        # versions only the app's silence timeout adapts
+        self.changed = False
+        if hasattr(recognizer, "SetEndpointerDelays"):
+            recognizer.SetEndpointerDelays(self.start_timeout, self.delay, self.max_utterance)
+
+    def stats(self):
+        return {"endpoint_delay": self.delay, "pauses_observed": len(self.pauses)}
@@ -0,0 +1,124 @@
+import json
+import time
+
+import numpy as np
+
+DEFAULT_PHRASES = [
+    "the quick brown fox jumps over the lazy dog",
+    "please schedule the meeting for tomorrow morning",
+    "send the report to the whole team",
+]
+
+
+class FakeRecognizer:
+    # In-process stand-in for vosk.KaldiRecognizer. Speech is detected by energy, words are
+    # taken from phrases at words_per_second while speech lasts, and an utterance ends after
+    # endpoint_silence seconds of silence. Each AcceptWaveform call costs
+    # decode_delay + realtime_factor * chunk_seconds of wall time to mimic decoding, plus
+    # utterance_cost per second of the current utterance to mimic a growing lattice.
+    # With noise_word set, every final ends with that word at noise_confidence, timed in the
+    # trailing silence, like Kaldi's "the" on background noise.
+    def __init__(self, samplerate=16000, phrases=None, decode_delay=0.0, realtime_factor=0.0,
+                 words_per_second=2.5, endpoint_silence=0.5, silence_threshold=100, confidence=0.95,
+                 utterance_cost=0.0, noise_word=None, noise_confidence=0.3):
+        self.samplerate = samplerate
+        self.phrases = phrases or DEFAULT_PHRASES
+        self.decode_delay = decode_delay
+        self.realtime_factor = realtime_factor
+        self.words_per_second = words_per_second
+        self.endpoint_silence = endpoint_silence
+        self.silence_threshold = silence_threshold
+        self.confidence = confidence
+        self.utterance_cost = utterance_cost
+        self.noise_word = noise_word
+        self.noise_confidence = noise_confidence
+
+        self.words_enabled = False
+        self.accept_calls = 0
+        self._phrase_index = 0
+        self._time = 0.0  # Seconds of audio seen since creation or Reset()
+        self._final = None
+        self._reset_utterance()
+
+    def SetWords(self, enabled):
+        self.words_enabled = bool(enabled)
+
+    def SetEndpointerDelays(self, t_start_max, t_end, t_max):
+        self.endpoint_silence = t_end
+
+    def Reset(self):
+        self._time = 0.0
+        self._final = None
+        self._reset_utterance()
+
+    def AcceptWaveform(self, data):
+        audio = np.frombuffer(data, dtype=np.int16)
+        seconds = len(audio) / self.samplerate
+        self.accept_calls += 1
+        delay = self.decode_delay + self.realtime_factor * seconds
+        if self._speech_start is not None:
+            delay += self.utterance_cost * (self._time - self._speech_start)
+        if delay > 0:
+            time.sleep(delay)
+
+        is_speech = len(audio) and np.mean(np.abs(audio.astype(np.int32))) > self.silence_threshold
+        chunk_start = self._time
+        self._time += seconds
+        if is_speech:
+            if self._speech_start is None:
+                self._speech_start = chunk_start
+            self._speech_seconds += seconds
+            self._trailing_silence = 0.0
+            self._emit_words()
+            return False
+
+        if self._speech_start is None:
+            return False
+        self._trailing_silence += seconds
+        if self._trailing_silence >= self.endpoint_silence:
+            self._final = self._build_result()
+            self._reset_utterance()
+            return True
+        return False
+
+    def Result(self):
+        result, self._final = self._final or {"text": ""}, None
+        return json.dumps(result)
+
+    def PartialResult(self):
+        return json.dumps({"partial": " ".join(word["word"] for word in self._words)})
+
+    def FinalResult(self):
+        result = self._build_result() if self._speech_start is not None else {"text": ""}
+        self._reset_utterance()
+        return json.dumps(result)
+
+    def _reset_utterance(self):
+        self._words = []
+        self._speech_start = None
+        self._speech_seconds = 0.0
+        self._trailing_silence = 0.0
+        self._phrase_words = self.phrases[self._phrase_index % len(self.phrases)].split()
+
+    def _emit_words(self):
+        word_seconds = 1.0 / self.words_per_second
+        while (len(self._words) + 1) * word_seconds <= self._speech_seconds:
+            index = len(self._words)
+            start = self._speech_start + index * word_seconds
+            self._words.append({
+                "conf": self.confidence,
+                "start": round(start, 2),
+                "end": round(start + word_seconds * 0.9, 2),
+                "word": self._phrase_words[index % len(self._phrase_words)],
+            })
+
+    def _build_result(self):
+        self._phrase_index += 1
+        if self.noise_word and self._words:
+            noise_start = self._speech_start + self._speech_seconds + 0.1
+            self._words.append({"conf": self.noise_confidence, "start": round(noise_start, 2),
+                                "end": round(noise_start + 0.2, 2), "word": self.noise_word})
+        result = {"text": " ".join(word["word"] for word in self._words)}
+        if self.words_enabled and self._words:
+            result["result"] = list(self._words)
+        return result
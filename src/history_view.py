@@ -0,0 +1,156 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualHistoryView:
+    # Shows a long list of entries in a tk.Text, one entry per line. Only the entries in the
+    # viewport plus margin entries on each side are inserted into the widget. The rest stay in the
+    # store and are fetched when scrolling leaves the materialized range, so redraws, scrolling
+    # and edits cost the same for ten entries or a hundred thousand.
+    # Scrolling is by whole entries (mouse wheel, Page Up/Down, scrollbar). With follow_tail the
+    # view sticks to the newest entry while it is scrolled to the bottom.
+    #
+    # count() returns the number of entries, fetch(start, end) the entries in [start, end).
+    # decorate(widget, line_index, entry_index, entry) can add tags to a freshly inserted line.
+    # store_edits(start, end, lines) receives the widget's lines when an editable view is
+    # re-rendered or committed, so edits to the materialized entries are never lost.
+    def __init__(self, text, count, fetch, decorate=None, store_edits=None, scrollbar=None,
+                 margin=20, follow_tail=True, placeholder=None):
+        self.text = text
+        self.count = count
+        self.fetch = fetch
+        self.decorate = decorate
+        self.store_edits = store_edits
+        self.scrollbar = scrollbar
+        self.margin = margin
+        self.follow_tail = follow_tail
+        self.placeholder = placeholder
+        self.top = 0  # First entry in the viewport
+        self.start = 0  # Materialized entries are [start, end)
+        self.end = 0
+        self.following = follow_tail
+        self.editable = False
+        self.renders = 0
+        self.materialized = 0  # Entries inserted into the widget, over all renders
+
+        if scrollbar is not None:
+            scrollbar.config(command=self.yview)
+        text.bind("<MouseWheel>", lambda event: self.scroll_by(-3 if event.delta > 0 else 3))
+        text.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        text.bind("<Button-5>", lambda event: self.scroll_by(3))
+        text.bind("<Prior>", lambda event: self.scroll_by(-self.visible_entries()))
+        text.bind("<Next>", lambda event: self.scroll_by(self.visible_entries()))
+
+    def visible_entries(self):
+        # Viewport height in lines; an entry takes at least one
+        height = self.text.winfo_height()
+        if height <= 1:  # Not mapped yet
+            return int(self.text.cget("height"))
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        return max(1, height // linespace)
+
+    def refresh(self):
+        # Re-render after the store changed
+        if self.following:
+            self.top = max(0, self.count() - self.visible_entries())
+        self._render()
+
+    def scroll_by(self, entries):
+        self._scroll_to_top(self.top + entries)
+        return "break"  # Keep Tk from scrolling the partial widget content on its own
+
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", number, "units" | "pages")
+        total = self.count()
+        if args[0] == "moveto":
+            self._scroll_to_top(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            step = self.visible_entries() if args[2] == "pages" else 1
+            self._scroll_to_top(self.top + int(args[1]) * step)
+
+    def scroll_to(self, index):
+        # Makes entry index visible and returns the widget index of its line
+        visible = self.visible_entries()
+        if index < self.top:
+            self._scroll_to_top(index)
+        elif index >= self.top + visible:
+            self._scroll_to_top(index - visible + 1)
+        return self.line_index(index)
+
+    def line_index(self, index):
+        # Widget index of entry index, None if it is not materialized
+        if self.start <= index < self.end:
+            return f"{index - self.start + 1}.0"
+        return None
+
+    def entry_at(self, text_index):
+        # (entry index, character offset) of a widget index such as "insert"
+        line, char = map(int, self.text.index(text_index).split("."))
+        return min(self.start + line - 1, max(self.start, self.end - 1)), char
+
+    def set_editable(self, editable):
+        if self.editable and not editable:
+            self.commit_edits()
+        self.editable = editable
+        self.text.config(state=tk.NORMAL if editable else tk.DISABLED)
+
+    def commit_edits(self):
+        # Hand the materialized lines back to the store; the widget ends with a newline
+        if self.store_edits is not None and self.end > self.start:
+            lines = self.text.get("1.0", "end - 1 chars").split("\n")
+            if lines and lines[-1] == "":
+                lines.pop()
+            self.store_edits(self.start, self.end, lines)
+
+    def stats(self):
+        return {"renders": self.renders, "materialized": self.materialized,
+                "entries": self.count(), "window": self.end - self.start}
+
+    def _scroll_to_top(self, top):
+        total = self.count()
+        visible = self.visible_entries()
+        self.top = max(0, min(top, total - visible))
+        self.following = self.follow_tail and self.top + visible >= total
+        if self.start <= self.top and self.top + visible <= self.end and not self.editable:
+            self._place()  # Still inside the materialized range, no need to fetch
+        else:
+            self._render()
+
+    def _render(self):
+        if self.editable:
+            self.commit_edits()
+        total = self.count()
+        visible = self.visible_entries()
+        self.top = max(0, min(self.top, total - visible))
+        self.start = max(0, self.top - self.margin)
+        self.end = min(total, self.top + visible + self.margin)
+        entries = [entry.replace("\n", " ") for entry in self.fetch(self.start, self.end)]
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        if entries:
+            self.text.insert("1.0", "".join(f"{entry}\n" for entry in entries))
+            if self.decorate is not None:
+                for offset, entry in enumerate(entries):
+                    self.decorate(self.text, f"{offset + 1}.0", self.start + offset, entry)
+        elif self.placeholder:
+            self.text.insert("1.0", f"\n{self.placeholder}")
+            self.text.tag_add("center", "2.0", "2.end")
+            self.text.tag_add("placeholder", "2.0", "2.end")
+        if not self.editable:
+            self.text.config(state=tk.DISABLED)
+        self.renders += 1
+        self.materialized += len(entries)
+        self._place()
+
+    def _place(self):
+        total = self.count()
+        if self.following:
+            self.text.yview_moveto(1.0)  # Entries may wrap, so pin the real bottom rather than top
+        else:
+            self.text.yview(f"{self.top - self.start + 1}.0")
+        if self.scrollbar is not None:
+            if total:
+                self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_entries()) / total))
+            else:
+                self.scrollbar.set(0.0, 1.0)
@@ -1,15 +1,25 @@
 import vosk
-import json
-import sounddevice as sd
-import numpy as np
 import pyperclip
 import tkinter as tk
 from tkinter import scrolledtext, PanedWindow, VERTICAL
-import threading
 import time
-import queue
 import os
+import sys
 from collections import deque
+from functools import partial
+
+from audio_sources import MicrophoneSource
+from control_socket import ControlServer, send_command
+from denoise import StreamingDenoiser
+from device_probe import remembered_input
+from dictation_engine import DictationEngine
+from endpointing import AdaptiveEndpointer
+from history_view import VirtualHistoryView
+from noise_filter import NoiseWordFilter
+from output_sinks import SinkDispatcher
+from profiler import SamplingProfiler
+from shm_capture import SharedMemoryCapture
+from word_store import WordStore
 
 # Path to your model
 MODEL_PATH_RELATIVE = "../models/vosk-model-en-us-0.22"
@@ -23,11 +33,26 @@ BUTTON_BG = "#555555"
 BUTTON_FG = "#E0B0FF"
 STATUS_FG = "#90EE90"  # Light green for status
 PLACEHOLDER_FG = "#888888"  # Lighter grey to simulate 60% transparency for placeholders
+LOW_CONFIDENCE_FG = "#FFA500"  # Orange for words the recognizer was unsure about
 
 # Constants
 MAX_ARCHIVE_ENTRIES = 6
 SILENCE_THRESHOLD = 100  # Adjust threshold as needed
 MAX_SILENCE_DURATION = 4  # Silence duration in seconds
+AUDIO_QUEUE_MAX_CHUNKS = 50  # 5 seconds of audio at 100 ms chunks
+AUDIO_QUEUE_POLICY = "skip_silence"  # "block", "drop_oldest" or "skip_silence"
+LAG_WARNING_SECONDS = 1.5  # Backlog above which the status shows "Falling behind"
+START_POLL_MS = 50  # How often a Record press during processing checks whether it can start
+CAPTURE_IN_PROCESS = False  # Capture in a separate process over shared memory, immune to UI/GIL stalls
+INPUT_DEVICE = None  # "name, host API" from device_probe.py --list; None uses the device device_probe.py found fastest
+DENOISE_ENABLED = False  # Spectral noise gate ahead of the recognizer, for fan and hum noise
+MAX_UTTERANCE_SECONDS = 30  # Force a segment boundary in long unbroken speech to keep partials responsive
+ADAPTIVE_ENDPOINTING = True  # Learn the end-of-segment silence from your own pauses, up to MAX_SILENCE_DURATION
+LOW_CONFIDENCE_THRESHOLD = 0.6  # Words below this Vosk confidence are highlighted
+NOISE_WORD_CONFIDENCE = 0.5  # Words below this confidence over quiet audio or at a segment edge are dropped as noise; 0 = off
+PROFILE_SECONDS = 30  # Length of an on-demand profiler capture (Ctrl+P)
+PROFILE_DIR = "~/.cache/vosk-dictation/profiles"  # Collapsed stacks for flamegraph.pl / speedscope
+OUTPUT_SINKS = []  # Extra outputs for final results, e.g. ["type", "file:~/dictation.txt", "fifo:/tmp/vdic", "stdout"]
 
 class DictationApp:
     def __init__(self, root):
@@ -40,12 +65,19 @@ class DictationApp:
         # Setup variables
         self.is_recording = False
         self.vdic_history = list()  # Unlimited entries for vdicHistory1 to vdicHistoryn
-        self.archive = deque(maxlen=MAX_ARCHIVE_ENTRIES)  # Archive entries limited to 6 (archive1 to archive6)
+        self.vdic_segments = list()  # WordStore segment for each vdicHistory entry, None if unknown
+        self.word_store = WordStore()  # Word timings and confidences for every final result
+        self.archive = deque(maxlen=MAX_ARCHIVE_ENTRIES)  # Archive entries limited to 6 (archive1 to archive6), each a list of vdicHistory entries
         self.history_position = -1  # -1 means not showing history
         self.silence_timer = 0
         self.last_speech_time = time.time()
-        self.audio_queue = queue.Queue()
         self.edit_mode = False
+        self.stop_pressed_at = None  # perf_counter() of the last Stop, for the stop-to-clipboard latency
+        self.speculative_clipboard = False  # The clipboard holds a partial that the final has not replaced yet
+        self.clipboard_before_stop = ""  # What the speculative copy replaced, put back if no final arrives
+        self.start_when_stopped = False  # Record was pressed while the previous session was still draining
+        self.output_sinks = SinkDispatcher.from_specs(OUTPUT_SINKS)  # Written asynchronously, never stalls recognition
+        self.profiler = SamplingProfiler(PROFILE_DIR)
         
         # Create UI
         self.create_widgets()
@@ -63,10 +95,39 @@ class DictationApp:
 
         self.samplerate = 16000
         self.recognizer = vosk.KaldiRecognizer(self.model, self.samplerate)
+        self.shared_capture = None
+        input_settings = {"device": INPUT_DEVICE} if INPUT_DEVICE else remembered_input()
+        microphone_factory = partial(MicrophoneSource, **input_settings)
+        if CAPTURE_IN_PROCESS:
+            self.shared_capture = SharedMemoryCapture(self.samplerate, source_factory=microphone_factory)
+            self.shared_capture.start_process()  # Spawn now so the first Record click doesn't wait for it
+        self.engine = DictationEngine(self.recognizer, self.samplerate, silence_threshold=SILENCE_THRESHOLD,
+                                      max_silence_duration=MAX_SILENCE_DURATION, queue_max_chunks=AUDIO_QUEUE_MAX_CHUNKS,
+                                      queue_policy=AUDIO_QUEUE_POLICY, lag_warning_seconds=LAG_WARNING_SECONDS,
+                                      word_store=self.word_store, max_utterance_seconds=MAX_UTTERANCE_SECONDS,
+                                      endpointer=AdaptiveEndpointer(max_delay=MAX_SILENCE_DURATION) if ADAPTIVE_ENDPOINTING else None,
+                                      denoiser=StreamingDenoiser(self.samplerate) if DENOISE_ENABLED else None,
+                                      noise_filter=NoiseWordFilter(NOISE_WORD_CONFIDENCE) if NOISE_WORD_CONFIDENCE else None,
+                                      source_factory=(lambda samplerate: self.shared_capture) if self.shared_capture else microphone_factory)
+        # Engine callbacks arrive on the events thread, hand them to the Tk main loop
+        self.engine.on_final = lambda text, segment: self.root.after(0, self.save_to_vdic_history, text, segment)
+        self.engine.on_lag = lambda falling_behind, lag: self.root.after(0, self.show_lag_status, falling_behind, lag)
+        self.engine.on_stopped = lambda stats: self.root.after(0, self.on_processing_finished, stats)
+        self.engine.on_error = lambda e: self.root.after(0, self.on_recording_error, e)
         
         # Bind keyboard shortcuts
         self.root.bind('<Control-Up>', self.navigate_history_up)
         self.root.bind('<Control-Down>', self.navigate_history_down)
+        self.root.bind('<Control-j>', self.jump_to_low_confidence_word)
+        self.root.bind('<Control-p>', self.toggle_profiler)
+
+        # Control socket for hotkeys and second launches (vdic_ctl.py toggle)
+        self.control = None
+        try:
+            self.control = ControlServer(self.control_handlers(), run=lambda function: self.root.after(0, function)).start()
+        except (FileExistsError, OSError) as e:
+            print(f"Control socket not available: {e}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def create_widgets(self):
         # Top frame for buttons
@@ -92,21 +153,29 @@ class DictationApp:
         # Archive1 Text area (top, aspect ratio 13:4)
         self.archive1_area = tk.Text(text_frame, wrap=tk.WORD, height=4, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR)
         self.archive1_area.pack(fill=tk.X, pady=2)
-        self.archive1_area.config(state=tk.NORMAL)
-        self.archive1_area.insert("2.0", "\n<< -- Archive Entry 1 -- >>")
         self.archive1_area.tag_configure("center", justify='center')
         self.archive1_area.tag_configure("placeholder", foreground=PLACEHOLDER_FG)
-        self.archive1_area.tag_add("center", "2.0", "2.end")
-        self.archive1_area.tag_add("placeholder", "2.0", "2.end")
-        self.archive1_area.config(state=tk.DISABLED)
+        self.archive1_view = VirtualHistoryView(self.archive1_area, count=lambda: len(self.archive[0]) if self.archive else 0,
+                                                fetch=lambda start, end: self.archive[0][start:end],
+                                                follow_tail=False, placeholder="<< -- Archive Entry 1 -- >>")
         
         # Spacer frame between Archive1 and vdicHistory
         spacer1 = tk.Frame(text_frame, height=5, bg=BG_COLOR)
         spacer1.pack(fill=tk.X)
         
-        # vdicHistory Text area (middle, aspect ratio 13:8)
-        self.history_area = tk.Text(text_frame, wrap=tk.WORD, height=8, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR)
-        self.history_area.pack(fill=tk.X, pady=2)
+        # vdicHistory Text area (middle, aspect ratio 13:8). Only the entries around the viewport are
+        # in the widget, the view fetches the rest from vdic_history as it scrolls
+        history_frame = tk.Frame(text_frame, bg=BG_COLOR)
+        history_frame.pack(fill=tk.X, pady=2)
+        history_scrollbar = tk.Scrollbar(history_frame, bg=BUTTON_BG, troughcolor=BG_COLOR)
+        history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_area = tk.Text(history_frame, wrap=tk.WORD, height=8, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR)
+        self.history_area.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.history_area.tag_configure("low_conf", foreground=LOW_CONFIDENCE_FG, underline=True)
+        self.history_view = VirtualHistoryView(self.history_area, count=lambda: len(self.vdic_history),
+                                               fetch=lambda start, end: self.vdic_history[start:end],
+                                               decorate=self.highlight_history_entry, store_edits=self.replace_history_entries,
+                                               scrollbar=history_scrollbar)
         
         # Spacer frame between vdicHistory and Archive6
         spacer2 = tk.Frame(text_frame, height=5, bg=BG_COLOR)
@@ -115,13 +184,12 @@ class DictationApp:
         # Archive6 Text area (bottom, aspect ratio 13:4)
         self.archive6_area = tk.Text(text_frame, wrap=tk.WORD, height=4, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR)
         self.archive6_area.pack(fill=tk.X, pady=2)
-        self.archive6_area.config(state=tk.NORMAL)
-        self.archive6_area.insert("2.0", "\n<< -- Archive Entry 6 -- >>")
         self.archive6_area.tag_configure("center", justify='center')
         self.archive6_area.tag_configure("placeholder", foreground=PLACEHOLDER_FG)
-        self.archive6_area.tag_add("center", "2.0", "2.end")
-        self.archive6_area.tag_add("placeholder", "2.0", "2.end")
-        self.archive6_area.config(state=tk.DISABLED)
+        self.archive6_view = VirtualHistoryView(self.archive6_area, count=lambda: len(self.archive[-1]) if len(self.archive) == MAX_ARCHIVE_ENTRIES else 0,
+                                                fetch=lambda start, end: self.archive[-1][start:end],
+                                                follow_tail=False, placeholder="<< -- Archive Entry 6 -- >>")
+        self.update_history_display()
 
     def toggle_recording(self):
         if not hasattr(self, 'model'):  # Check if model loaded successfully
@@ -129,6 +197,14 @@ class DictationApp:
             return
 
         if not self.is_recording:
+            if self.engine.is_busy():
+                # Joining the draining session here would block the Tk thread its callbacks wait
+                # for; start_when_idle starts the new one once it is done (pressing again cancels)
+                self.start_when_stopped = not self.start_when_stopped
+                if self.start_when_stopped:
+                    self.root.after(START_POLL_MS, self.start_when_idle)
+                self.status_label.config(text="Starting after processing..." if self.start_when_stopped else "Processing...")
+                return
             self.start_recording()
         else:
             self.stop_recording()
@@ -145,143 +221,163 @@ class DictationApp:
         if self.vdic_history:
             self.push_to_archive()
             
-        # Start recording thread
-        self.recording_thread = threading.Thread(target=self.record_audio)
-        self.recording_thread.daemon = True
-        self.recording_thread.start()
-        
-        # Start processing thread
-        self.processing_thread = threading.Thread(target=self.process_audio)
-        self.processing_thread.daemon = True
-        self.processing_thread.start()
+        # Start recording and processing threads
+        self.engine.start()
         
     def stop_recording(self):
         self.is_recording = False
+        self.stop_pressed_at = time.perf_counter()
+        self.engine.stop()
+        # Stage the latest partial on the clipboard now; the final replaces it a few milliseconds later
+        speculative = self.engine.speculative_text().strip()
+        if speculative:
+            try:
+                self.clipboard_before_stop = pyperclip.paste()
+            except pyperclip.PyperclipException:
+                self.clipboard_before_stop = ""
+            pyperclip.copy(speculative)
+            self.speculative_clipboard = True
+            print(f"Stop to speculative clipboard: {(time.perf_counter() - self.stop_pressed_at) * 1000:.1f}ms")
         self.toggle_button.config(text="Record")
         self.status_label.config(text="Processing...")
         
-        # Safeguard to remove 'the' if it's the only text generated
-        if self.vdic_history:
-            last_entry = self.vdic_history[-1].strip().lower()
-            # Check if the last entry is only 'the' or multiple instances of 'the'
-            if last_entry and last_entry.replace('the', '').replace(' ', '') == '':
-                self.vdic_history.pop()
-                self.history_position = len(self.vdic_history) - 1 if self.vdic_history else -1
-                self.update_history_display()
-        
-    def record_audio(self):
-        with sd.InputStream(samplerate=self.samplerate, channels=1, dtype='int16') as stream:
-            while self.is_recording:
-                audio_chunk = stream.read(self.samplerate // 10)[0]
-                self.audio_queue.put(audio_chunk)
-        
-    def process_audio(self):
-        current_text = ""
-        silence_counter = 0
-        
-        while self.is_recording or not self.audio_queue.empty():
-            if not self.audio_queue.empty():
-                audio_chunk = self.audio_queue.get()
-                
-                # Check if there's speech in this chunk
-                energy = np.mean(np.abs(audio_chunk))
-                if energy > SILENCE_THRESHOLD:  # Adjust threshold as needed
-                    silence_counter = 0
-                    self.last_speech_time = time.time()
-                else:
-                    silence_counter += 1
-                
-                # Process the audio
-                if self.recognizer.AcceptWaveform(audio_chunk.tobytes()):
-                    result = json.loads(self.recognizer.Result())
-                    if result.get("text"):
-                        current_text = result["text"]
-                        # Auto save to vdicHistory on final result
-                        self.save_to_vdic_history(current_text)
-                        current_text = ""
-                
-                else:
-                    partial_result = json.loads(self.recognizer.PartialResult())
-                    if partial_result.get("partial"):
-                        current_text = partial_result["partial"]
-                
-                # Check if silence exceeds threshold
-                silence_duration = silence_counter * (self.samplerate // 10) / self.samplerate
-                if silence_duration > MAX_SILENCE_DURATION:
-                    if current_text:
-                        self.save_to_vdic_history(current_text)
-                        current_text = ""
-                    # Reset silence counter
-                    silence_counter = 0
-            else:
-                time.sleep(0.1)
-        
-        # After loop ends, save any remaining text to vdicHistory
-        if current_text:
-            self.save_to_vdic_history(current_text)
-            
-        # Set status to Idle
-        self.root.after(0, lambda: self.status_label.config(text="Idle"))
+    def on_recording_error(self, e):
+        print(f"Error during audio recording: {e}")
+        if self.is_recording:
+            self.is_recording = False
+            self.toggle_button.config(text="Record")
+
+    def on_processing_finished(self, stats):
+        print(f"Audio queue: max lag {stats['max_lag_seconds']:.1f}s, dropped {stats['dropped']}, "
+              f"skipped silence {stats['skipped_silence']}, blocked {stats['blocked_seconds']:.1f}s")
+        if "noise_dropped_segments" in stats:
+            print(f"Noise filter: {stats['noise_dropped_segments']} segments dropped (clipboard and history updates avoided), "
+                  f"{stats['noise_trimmed_words']} words trimmed, {stats['noise_suppressed_partials']} partials held back")
+        if self.speculative_clipboard:
+            # The utterance produced no final (e.g. it was noise), take the partial back off the clipboard
+            self.speculative_clipboard = False
+            pyperclip.copy(self.clipboard_before_stop)
+        if "stop_to_final_seconds" in stats:
+            print(f"Stop to final result: {stats['stop_to_final_seconds'] * 1000:.1f}ms, "
+                  f"{stats['flushed']} queued chunks flushed in one call")
+        if "final_latency_mean" in stats:
+            print(f"Endpointing: speech end to final mean {stats['final_latency_mean']:.2f}s, "
+                  f"max {stats['final_latency_max']:.2f}s, silence timeout {self.engine.max_silence_duration:.2f}s")
+        for name, metrics in self.output_sinks.metrics().items():
+            print(f"Output sink {name}: {metrics['written']} written, {metrics['dropped']} dropped, "
+                  f"{metrics['errors']} errors, mean latency {metrics['mean_latency_ms']:.1f}ms")
+        # A new session may already have started while this one was draining
+        if not self.is_recording and not self.start_when_stopped:
+            self.status_label.config(text="Idle")
+
+    def start_when_idle(self):
+        # Polled on the Tk thread after Record was pressed during processing, until every thread
+        # of the previous session has ended
+        if not self.start_when_stopped or self.is_recording:
+            return
+        if self.engine.is_busy():
+            self.root.after(START_POLL_MS, self.start_when_idle)
+            return
+        self.start_when_stopped = False
+        self.start_recording()
+
+    def show_lag_status(self, falling_behind, lag):
+        # Visible warning while the recognizer is behind real time
+        if falling_behind:
+            self.status_label.config(text=f"Falling behind ({lag:.1f}s)")
+        else:
+            self.status_label.config(text="Listening..." if self.is_recording else "Processing...")
     
-    def save_to_vdic_history(self, text):
-        if text.strip():  # Only save non-empty text
-            # Ignore if the text is only 'the' or multiple instances of 'the'
-            if text.strip().lower().replace('the', '').replace(' ', '') == '':
-                return
+    def save_to_vdic_history(self, text, segment=None):
+        if text.strip():  # Only save non-empty text; noise words were already removed by the engine
             # Add new text as the last entry (most recent at bottom)
             self.vdic_history.append(text)
+            self.vdic_segments.append(segment)
             self.history_position = len(self.vdic_history) - 1  # Set position to the last entry
-            # Update clipboard with the latest entry, removing trailing 'the'
-            clipboard_text = text.rstrip()
-            if clipboard_text.lower().endswith(' the'):
-                clipboard_text = clipboard_text[:-4].rstrip()
-            pyperclip.copy(clipboard_text if clipboard_text else text)
+            # Update clipboard with the latest entry
+            pyperclip.copy(text.strip())
+            self.speculative_clipboard = False
+            if self.stop_pressed_at is not None and not self.is_recording:
+                print(f"Stop to clipboard: {(time.perf_counter() - self.stop_pressed_at) * 1000:.1f}ms")
+            self.output_sinks.dispatch(text.strip())
             self.update_history_display()
         
     def update_history_display(self):
-        # Update vdicHistory area
-        self.history_area.config(state=tk.NORMAL)
-        self.history_area.delete("1.0", tk.END)
-        # Display vdicHistory entries without numbering as a contiguous block
-        for entry in self.vdic_history:
-            self.history_area.insert(tk.END, f"{entry}\n")
-        self.history_area.config(state=tk.DISABLED)
+        # Each view only re-renders the entries around its viewport, whatever the history size
+        self.history_view.refresh()
+        self.archive1_view.refresh()
+        self.archive6_view.refresh()
 
-        # Update Archive1 area
-        self.archive1_area.config(state=tk.NORMAL)
-        self.archive1_area.delete("1.0", tk.END)
-        if len(self.archive) > 0:
-            self.archive1_area.insert(tk.END, self.archive[0])
-        else:
-            self.archive1_area.insert("2.0", "\n<< -- Archive Entry 1 -- >>")
-            self.archive1_area.tag_configure("center", justify='center')
-            self.archive1_area.tag_configure("placeholder", foreground=PLACEHOLDER_FG)
-            self.archive1_area.tag_add("center", "2.0", "2.end")
-            self.archive1_area.tag_add("placeholder", "2.0", "2.end")
-        self.archive1_area.config(state=tk.DISABLED)
+    def replace_history_entries(self, start, end, lines):
+        # Edits from the history pane for entries start..end; a line count change (lines joined
+        # or split while editing) makes the edited lines new entries without word timings
+        lines = [line.strip() for line in lines if line.strip()]
+        segments = self.vdic_segments[start:end] if len(lines) == end - start else [None] * len(lines)
+        self.vdic_history[start:end] = lines
+        self.vdic_segments[start:end] = segments
 
-        # Update Archive6 area
-        self.archive6_area.config(state=tk.NORMAL)
-        self.archive6_area.delete("1.0", tk.END)
-        if len(self.archive) == MAX_ARCHIVE_ENTRIES:
-            self.archive6_area.insert(tk.END, self.archive[-1])
-        else:
-            self.archive6_area.insert("2.0", "\n<< -- Archive Entry 6 -- >>")
-            self.archive6_area.tag_configure("center", justify='center')
-            self.archive6_area.tag_configure("placeholder", foreground=PLACEHOLDER_FG)
-            self.archive6_area.tag_add("center", "2.0", "2.end")
-            self.archive6_area.tag_add("placeholder", "2.0", "2.end")
-        self.archive6_area.config(state=tk.DISABLED)
+    def toggle_profiler(self, event=None):
+        # Sample the capture, processing and UI threads for PROFILE_SECONDS, or stop a running capture early
+        if self.profiler.is_running():
+            self.profiler.stop()
+            return
+        self.profiler.start(PROFILE_SECONDS, on_done=lambda path: self.root.after(0, self.on_profile_written, path))
+        self.status_label.config(text=f"Profiling ({PROFILE_SECONDS}s)...")
+
+    def on_profile_written(self, path):
+        print(f"Profile written to {path}")
+        self.status_label.config(text="Profile saved")
+        self.root.after(2000, lambda: self.status_label.config(text="Idle" if not self.is_recording else "Listening..."))
+
+    def highlight_history_entry(self, widget, start_index, entry_index, text):
+        self.highlight_low_confidence(widget, start_index, text, self.vdic_segments[entry_index])
+
+    def highlight_low_confidence(self, widget, start_index, text, segment):
+        if segment is None:
+            return
+        for start, end in self.word_store.low_confidence_spans(segment, text, LOW_CONFIDENCE_THRESHOLD):
+            widget.tag_add("low_conf", f"{start_index} + {start} chars", f"{start_index} + {end} chars")
+
+    def jump_to_low_confidence_word(self, event=None):
+        # Move the cursor to the next low-confidence word, wrapping to the top. The search runs over
+        # the history itself, the widget only holds the entries around the viewport.
+        if not self.vdic_history:
+            return "break"
+        entry, char = self.history_view.entry_at(tk.INSERT)
+        for step in range(len(self.vdic_history) + 1):
+            index = (entry + step) % len(self.vdic_history)
+            segment = self.vdic_segments[index]
+            if segment is None:
+                continue
+            spans = self.word_store.low_confidence_spans(segment, self.vdic_history[index], LOW_CONFIDENCE_THRESHOLD)
+            if step == 0:
+                spans = [span for span in spans if span[0] > char]  # Only words after the cursor
+            if spans:
+                target = f"{self.history_view.scroll_to(index)} + {spans[0][0]} chars"
+                self.history_area.mark_set(tk.INSERT, target)
+                self.history_area.see(target)
+                if self.edit_mode:
+                    self.history_area.focus_set()
+                break
+        return "break"
 
     def navigate_history_up(self, event=None):
         if self.vdic_history and self.history_position > 0:
             self.history_position -= 1
-            # No UI update since Active Speech Window is removed, but conceptually moving up to older entries
+            self.show_history_entry()
         
     def navigate_history_down(self, event=None):
         if self.vdic_history and self.history_position < len(self.vdic_history) - 1:
             self.history_position += 1
-            # No UI update since Active Speech Window is removed, but conceptually moving down to newer entries
+            self.show_history_entry()
+
+    def show_history_entry(self):
+        # Scroll to the selected entry and put the cursor on its first low-confidence word, if any
+        line_index = self.history_view.scroll_to(self.history_position)
+        next_range = self.history_area.tag_nextrange("low_conf", line_index, f"{line_index} lineend")
+        target = next_range[0] if next_range else line_index
+        self.history_area.mark_set(tk.INSERT, target)
+        self.history_area.see(target)
     
     def toggle_edit_mode(self):
         if not self.edit_mode:
@@ -289,7 +385,7 @@ class DictationApp:
             if self.vdic_history:
                 self.edit_mode = True
                 self.edit_button.config(text="Save")
-                self.history_area.config(state=tk.NORMAL)
+                self.history_view.set_editable(True)
                 self.history_position = len(self.vdic_history) - 1  # Set to the latest entry
                 self.status_label.config(text="Editing...")
             else:
@@ -299,32 +395,76 @@ class DictationApp:
             # Exit Edit Mode, save changes to vdicHistory
             self.edit_mode = False
             self.edit_button.config(text="Edit")
-            current_text = self.history_area.get("1.0", tk.END).strip()
-            if current_text and self.history_position >= 0 and self.history_position < len(self.vdic_history):
-                # Update the history entry with edited text
-                self.vdic_history[self.history_position] = current_text
-                # Update clipboard, removing trailing 'the'
-                clipboard_text = current_text.rstrip()
-                if clipboard_text.lower().endswith(' the'):
-                    clipboard_text = clipboard_text[:-4].rstrip()
-                pyperclip.copy(clipboard_text if clipboard_text else current_text)
-                self.update_history_display()
-            self.history_area.config(state=tk.DISABLED)
+            self.history_view.set_editable(False)  # Writes the edited lines back to vdic_history
+            self.history_position = min(self.history_position, len(self.vdic_history) - 1)
+            if self.history_position >= 0:
+                # Update clipboard with the edited entry
+                pyperclip.copy(self.vdic_history[self.history_position])
+            self.update_history_display()
             self.status_label.config(text="Saved")
             self.root.after(2000, lambda: self.status_label.config(text="Idle" if not self.is_recording else "Listening..."))
 
+    def control_handlers(self):
+        # Commands accepted on the control socket, run on the Tk thread
+        return {
+            "toggle": self.toggle_recording,
+            "start": lambda: None if self.is_recording or self.start_when_stopped else self.toggle_recording(),
+            "stop": lambda: self.toggle_recording() if self.is_recording or self.start_when_stopped else None,
+            "copy-last": self.copy_last_entry,
+            "archive": self.archive_from_control,
+            "show": self.show_window,
+        }
+
+    def copy_last_entry(self):
+        if self.vdic_history:
+            pyperclip.copy(self.vdic_history[-1])
+        elif self.archive:
+            pyperclip.copy(self.archive[0][-1])
+        else:
+            raise LookupError("nothing transcribed yet")
+
+    def archive_from_control(self):
+        if self.is_recording:
+            raise RuntimeError("stop recording first")
+        self.push_to_archive()
+
+    def show_window(self):
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+
+    def on_close(self):
+        if self.control is not None:
+            self.control.close()
+        self.output_sinks.close()  # Flush and close file and FIFO outputs; sink threads never call into Tk
+        self.root.destroy()
+
     def push_to_archive(self):
         if self.vdic_history:
             # Push the latest vdicHistory content to archive1 only if there is text
-            archive_content = "\n".join(self.vdic_history)  # Combine all current history entries as one archive entry
-            if archive_content.strip():
+            archive_content = [entry for entry in self.vdic_history if entry.strip()]  # All current entries as one archive entry
+            if archive_content:
                 self.archive.appendleft(archive_content)
             # Clear vdicHistory for new recording
             self.vdic_history = []
+            self.vdic_segments = []
             self.history_position = -1
             self.update_history_display()
 
 if __name__ == "__main__":
+    # A second launch hands its command (toggle, start, stop, copy-last, ...) to the running window
+    # instead of loading the model again; without one, the window starts and then runs the command
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    reply = send_command(command)
+    if reply is not None:
+        if reply != "ok":
+            print(reply)
+        sys.exit(0 if reply == "ok" else 1)
     root = tk.Tk()
     app = DictationApp(root)
+    handler = app.control_handlers().get(command)
+    if handler is None:
+        print(f"Unknown command '{command}', expected one of {', '.join(sorted(app.control_handlers()))}")
+    elif command != "show" and hasattr(app, "model"):
+        root.after(0, handler)
     root.mainloop()
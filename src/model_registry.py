@@ -0,0 +1,173 @@
+import ctypes
+import gc
+import os
+import threading
+from collections import OrderedDict
+
+
+def directory_size(path):
+    # Bytes on disk under path; Vosk keeps roughly the whole model directory in memory
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def resident_memory():
+    # Resident set size of this process in bytes, None where /proc is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def release_free_memory():
+    # Collect unreachable models and ask glibc to hand freed heap pages back to the OS
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def load_vosk_model(path):
+    import vosk  # Imported lazily so the registry can be used without vosk installed
+    return vosk.Model(path)
+
+
+class ModelRegistry:
+    # Loads models by name and keeps the most recently used ones in memory, within budget_bytes.
+    # A name is a model directory under models_dir (e.g. "vosk-model-small-de-0.15") or a path.
+    # Model sizes are estimated from their size on disk, and the least recently used models are
+    # released before a new one is loaded, so the cache never goes over budget even while loading.
+    # The active model (the one the recognizer is using) is never evicted. Loading happens
+    # outside the lock, so the UI can query the registry while a model loads in the background;
+    # the size of a model being loaded is reserved against the budget meanwhile.
+    def __init__(self, models_dir, budget_bytes, loader=load_vosk_model, size_of=directory_size):
+        self.models_dir = models_dir
+        self.budget_bytes = budget_bytes
+        self.loader = loader
+        self.size_of = size_of
+        self.active = None
+        self._models = OrderedDict()  # path -> (model, size), least recently used first
+        self._loading = {}  # path -> (threading.Event set when the load ends, size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def available(self):
+        # Model directories found under models_dir
+        try:
+            return sorted(entry.name for entry in os.scandir(self.models_dir) if entry.is_dir())
+        except OSError:
+            return []
+
+    def resolve(self, name):
+        candidate = os.path.join(self.models_dir, name)
+        path = candidate if os.path.isdir(candidate) else os.path.expanduser(name)
+        return os.path.realpath(path)
+
+    def is_loaded(self, name):
+        with self._lock:
+            return self.resolve(name) in self._models
+
+    def get(self, name):
+        # Returns the loaded model, loading it first (slow) if it is not cached
+        path = self.resolve(name)
+        while True:
+            with self._lock:
+                if path in self._models:
+                    self._models.move_to_end(path)
+                    self.hits += 1
+                    return self._models[path][0]
+                if path not in self._loading:
+                    if not os.path.isdir(path):
+                        raise FileNotFoundError(f"Vosk model not found at {path}")
+                    size = self.size_of(path)
+                    self._make_room(size, path)
+                    loaded = threading.Event()
+                    self._loading[path] = (loaded, size)
+                    break
+                loaded = self._loading[path][0]
+            loaded.wait()  # Another thread is loading the same model; use its result, or retry if it failed
+
+        try:
+            model = self.loader(path)
+        except BaseException:
+            with self._lock:
+                del self._loading[path]
+            loaded.set()
+            raise
+        with self._lock:
+            del self._loading[path]
+            self._make_room(size, None)  # Others may have loaded models meanwhile
+            self._models[path] = (model, size)
+            self.loads += 1
+        loaded.set()
+        return model
+
+    def set_active(self, name):
+        with self._lock:
+            self.active = self.resolve(name)
+
+    def unload_all(self):
+        # Releases every cached model, the active one included; callers must drop their
+        # recognizers first, a KaldiRecognizer keeps its model alive
+        with self._lock:
+            self.evictions += len(self._models)
+            self._models.clear()
+            self.active = None
+        release_free_memory()
+
+    def recent(self):
+        # Names of loaded models, most recently used first
+        with self._lock:
+            return [self._display_name(path) for path in reversed(self._models)]
+
+    def set_budget(self, budget_bytes):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._make_room(0, None)
+
+    def memory_used(self):
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": len(self._models),
+                "memory_used": sum(size for _, size in self._models.values()),
+                "budget": self.budget_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _make_room(self, size, loading_path):
+        # Evict least recently used models, never the active one, until size more bytes fit
+        pinned = self._models[self.active][1] if self.active in self._models else 0
+        if loading_path is not None and pinned + size > self.budget_bytes:
+            # Refuse before evicting anything, a failed switch must not cost the cached models
+            raise MemoryError(f"Model {self._display_name(loading_path)} needs {size / 2**20:.0f} MB, but only "
+                              f"{(self.budget_bytes - pinned) / 2**20:.0f} MB of the {self.budget_bytes / 2**20:.0f} MB "
+                              f"model budget can be freed while the active model is in use")
+        used = sum(model_size for _, model_size in self._models.values())
+        used += sum(loading_size for _, loading_size in self._loading.values())
+        for path in list(self._models):
+            if used + size <= self.budget_bytes:
+                break
+            if path != self.active:
+                used -= self._models.pop(path)[1]
+                self.evictions += 1
+
+    def _display_name(self, path):
+        if os.path.dirname(path) == os.path.realpath(self.models_dir):
+            return os.path.basename(path)
+        return path
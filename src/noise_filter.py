@@ -0,0 +1,52 @@
+class NoiseWordFilter:
+    # Drops words the recognizer made up from noise (Kaldi's lone "the" on a click or a breath)
+    # before a final result reaches the word store, history, clipboard or outputs.
+    # A word below min_confidence is noise if the audio under it never rose above quiet_ratio
+    # times the VAD threshold; at either edge of the segment (noise before or after the speech)
+    # the looser edge_ratio applies, since an edge word often shares a chunk with the end of the
+    # speech. Low-confidence words in loud speech are kept, they are misheard speech the user can
+    # correct, and so is a loud segment made only of them (a short "yes", a proper noun). Only a
+    # segment with no chunk above the VAD threshold is dropped entirely.
+    #
+    # The engine also holds back partials until the utterance has a chunk above the VAD
+    # threshold, so noise-only hypotheses never flash up in the UI.
+    def __init__(self, min_confidence=0.5, quiet_ratio=2.0, edge_ratio=4.0):
+        self.min_confidence = min_confidence
+        self.quiet_ratio = quiet_ratio
+        self.edge_ratio = edge_ratio
+        self.dropped_segments = 0
+        self.trimmed_words = 0
+        self.suppressed_partials = 0
+
+    def filter(self, result, word_energies, silence_threshold):
+        # result is a Vosk final result with "result" words; word_energies holds the peak chunk
+        # energy under each word. Returns the result with noise words removed, None to drop it.
+        words = result.get("result")
+        if not words:
+            return result
+        quiet = silence_threshold * self.quiet_ratio
+        edge_quiet = silence_threshold * self.edge_ratio
+        unsure = [word.get("conf", 1.0) < self.min_confidence for word in words]
+        noise = [doubt and energy <= quiet for doubt, energy in zip(unsure, word_energies)]
+        edge_noise = [doubt and energy <= edge_quiet for doubt, energy in zip(unsure, word_energies)]
+        first = 0
+        while first < len(words) and edge_noise[first]:
+            first += 1
+        last = len(words)
+        while last > first and edge_noise[last - 1]:
+            last -= 1
+        kept = [word for index, word in enumerate(words) if first <= index < last and not noise[index]]
+        if not kept:
+            if any(energy > silence_threshold for energy in word_energies):
+                return result  # Speech was heard; a doubtful transcript beats losing it
+            self.dropped_segments += 1
+            return None
+        if len(kept) == len(words):
+            return result
+        self.trimmed_words += len(words) - len(kept)
+        return dict(result, text=" ".join(word["word"] for word in kept), result=kept)
+
+    def stats(self):
+        # Each dropped segment is a clipboard copy, history update and output write that did not happen
+        return {"noise_dropped_segments": self.dropped_segments, "noise_trimmed_words": self.trimmed_words,
+                "noise_suppressed_partials": self.suppressed_partials}
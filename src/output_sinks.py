@@ -0,0 +1,199 @@
+import errno
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# Text-injection backends tried in order for the "type" sink
+TYPING_BACKENDS = {
+    "xdotool": ["xdotool", "type", "--clearmodifiers", "--delay", "0", "--"],  # X11 via XTest
+    "ydotool": ["ydotool", "type", "--"],  # uinput, works on Wayland and the console
+    "wtype": ["wtype", "--"],  # Wayland virtual-keyboard protocol
+}
+
+
+class OutputSink:
+    name = "sink"
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StdoutSink(OutputSink):
+    name = "stdout"
+
+    def write(self, text):
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+
+
+class FileSink(OutputSink):
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.name = f"file:{self.path}"
+        self._file = None
+
+    def write(self, text):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(text + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FifoSink(OutputSink):
+    # Writes to a named pipe without ever blocking on a missing reader: segments
+    # produced while nobody is reading are reported as dropped.
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.name = f"fifo:{self.path}"
+        self._fd = None
+        if not os.path.exists(self.path):
+            os.mkfifo(self.path)
+
+    def write(self, text):
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno == errno.ENXIO:
+                    raise BrokenPipeError(f"No reader on {self.path}") from e
+                raise
+            os.set_blocking(self._fd, True)
+        data = (text + "\n").encode("utf-8")
+        try:
+            while data:
+                written = os.write(self._fd, data)
+                data = data[written:]
+        except BrokenPipeError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class TypingSink(OutputSink):
+    # Types each segment into the focused window, followed by a space so segments don't run together
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = next((name for name in TYPING_BACKENDS if shutil.which(name)), None)
+            if backend is None:
+                raise RuntimeError(f"No typing backend found, install one of: {', '.join(TYPING_BACKENDS)}")
+        elif backend not in TYPING_BACKENDS:
+            raise ValueError(f"Unknown typing backend '{backend}', expected one of {list(TYPING_BACKENDS)}")
+        self.backend = backend
+        self.name = f"type:{backend}"
+
+    def write(self, text):
+        subprocess.run(TYPING_BACKENDS[self.backend] + [text + " "], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def create_sink(spec):
+    # "stdout", "file:PATH", "fifo:PATH", "type" or "type:BACKEND"
+    kind, _, argument = spec.partition(":")
+    if kind == "stdout":
+        return StdoutSink()
+    if kind == "file" and argument:
+        return FileSink(argument)
+    if kind == "fifo" and argument:
+        return FifoSink(argument)
+    if kind == "type":
+        return TypingSink(argument or None)
+    raise ValueError(f"Invalid output sink '{spec}'")
+
+
+class SinkDispatcher:
+    # Fans final results out to every sink on its own worker thread, so a slow
+    # sink only ever backs up its own bounded queue, never the recognizer.
+    def __init__(self, sinks, max_pending=100):
+        self.sinks = list(sinks)
+        self._queues = []
+        self._threads = []
+        self._metrics = {}
+        self._lock = threading.Lock()
+        for sink in self.sinks:
+            sink_queue = queue.Queue(maxsize=max_pending)
+            self._metrics[sink.name] = {"written": 0, "dropped": 0, "errors": 0,
+                                        "total_latency": 0.0, "max_latency": 0.0}
+            thread = threading.Thread(target=self._run_sink, args=(sink, sink_queue), name=f"sink-{sink.name}")
+            thread.daemon = True
+            thread.start()
+            self._queues.append(sink_queue)
+            self._threads.append(thread)
+
+    @classmethod
+    def from_specs(cls, specs, max_pending=100):
+        return cls([create_sink(spec) for spec in specs], max_pending=max_pending)
+
+    def dispatch(self, text):
+        submitted = time.monotonic()
+        for sink, sink_queue in zip(self.sinks, self._queues):
+            try:
+                sink_queue.put_nowait((submitted, text))
+            except queue.Full:
+                with self._lock:
+                    self._metrics[sink.name]["dropped"] += 1
+
+    def _run_sink(self, sink, sink_queue):
+        while True:
+            item = sink_queue.get()
+            if item is None:
+                break
+            submitted, text = item
+            try:
+                sink.write(text)
+            except BrokenPipeError:
+                # Nobody reading a FIFO is expected, not a failure worth a line per segment
+                with self._lock:
+                    self._metrics[sink.name]["dropped"] += 1
+                continue
+            except Exception as e:
+                with self._lock:
+                    self._metrics[sink.name]["errors"] += 1
+                print(f"Output sink {sink.name} failed: {e}")
+                continue
+            latency = time.monotonic() - submitted
+            with self._lock:
+                metrics = self._metrics[sink.name]
+                metrics["written"] += 1
+                metrics["total_latency"] += latency
+                metrics["max_latency"] = max(metrics["max_latency"], latency)
+        sink.close()
+
+    def metrics(self):
+        # Per-sink counters; latency is measured from dispatch to the end of the write
+        report = {}
+        with self._lock:
+            for name, metrics in self._metrics.items():
+                written = metrics["written"]
+                report[name] = {
+                    "written": written,
+                    "dropped": metrics["dropped"],
+                    "errors": metrics["errors"],
+                    "mean_latency_ms": 1000 * metrics["total_latency"] / written if written else 0.0,
+                    "max_latency_ms": 1000 * metrics["max_latency"],
+                }
+        return report
+
+    def close(self, timeout=2.0):
+        for sink_queue in self._queues:
+            try:
+                sink_queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        for thread in self._threads:
+            thread.join(timeout)
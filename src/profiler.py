@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Threads are labelled by name in the profile; the Tk main loop shows up as "ui"
+THREAD_LABELS = {"MainThread": "ui"}
+
+
+class SamplingProfiler:
+    # Periodically snapshots the stacks of every Python thread and writes them in the
+    # collapsed "frame;frame;frame count" format read by flamegraph.pl, speedscope and inferno.
+    def __init__(self, output_dir, interval=0.005):
+        self.output_dir = os.path.expanduser(output_dir)
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, on_done=None):
+        # Sample for duration seconds (or until stop()), then write the profile and call on_done(path)
+        if self.is_running():
+            raise RuntimeError("Profiler is already running")
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration, on_done), name="profiler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self, duration, on_done):
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                thread_name = names.get(ident, f"thread-{ident}")
+                self.samples[self._collapse(THREAD_LABELS.get(thread_name, thread_name), frame)] += 1
+            self.sample_count += 1
+            self._stop_event.wait(self.interval)
+        path = self.write()
+        if on_done:
+            on_done(path)
+
+    def _collapse(self, thread_name, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":"))
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ";".join(reversed(stack))
+
+    def write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, time.strftime("vdic-profile-%Y%m%d-%H%M%S.folded"))
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
@@ -0,0 +1,163 @@
+import os
+
+# Keeps dictation within its share of a busy machine instead of letting it fall further and
+# further behind. Three levers:
+#
+#   - limit_decoder_threads() caps the BLAS threads Kaldi starts, so decoding uses one core
+#     rather than spreading over all of them. It only works before vosk is imported.
+#   - ResourceGovernor.apply_priorities() lowers the decoder threads' priority and raises the
+#     capture thread's, so the user's own work and the audio device come first. Raising needs
+#     CAP_SYS_NICE or an rlimit; without it capture simply stays at normal priority.
+#   - ResourceGovernor.check(), called every few seconds, takes the app's degradation steps one
+#     at a time (fewer partials, no denoise, a smaller model) while the machine is saturated or
+#     recognition is slower than real time, and undoes them once there is headroom again.
+
+DECODER_THREADS = 1
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def limit_decoder_threads(threads=DECODER_THREADS):
+    # A value set explicitly in the environment wins
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+
+
+def set_thread_nice(thread, nice):
+    # Linux schedules threads individually, so a thread's native id can be given its own nice
+    # value. Returns False where that is not possible or not permitted.
+    native_id = getattr(thread, "native_id", None)
+    if native_id is None or not hasattr(os, "setpriority"):
+        return False
+    try:
+        os.setpriority(os.PRIO_PROCESS, native_id, nice)
+    except OSError:
+        return False
+    return True
+
+
+class CpuSampler:
+    # System-wide CPU use since the previous sample, from /proc/stat; elsewhere the one-minute
+    # load average per core, which reacts slower but needs no baseline
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields) - idle, sum(fields)
+
+    def sample(self):
+        current = self._read()
+        if current is None or self._last is None:
+            try:
+                return min(1.0, os.getloadavg()[0] / (os.cpu_count() or 1))
+            except (AttributeError, OSError):
+                return None
+        busy = current[0] - self._last[0]
+        total = current[1] - self._last[1]
+        self._last = current
+        return busy / total if total > 0 else None
+
+
+class ResourceGovernor:
+    # steps is a list of (name, degrade, restore), cheapest first. degrade() returns False when the
+    # step does not apply (denoise already off, no smaller model) and the next one is tried.
+    # check() counts consecutive overloaded and relaxed checks: after `patience` overloaded ones it
+    # takes the next step, after `recovery` relaxed ones it restores the last step taken. The real-
+    # time factor is the engine's recognition time per second of audio since the previous check.
+    def __init__(self, engine, steps, cpu_high=0.9, cpu_low=0.6, rtf_high=1.0, rtf_low=0.6, patience=2,
+                 recovery=5, capture_nice=-5, decoder_nice=5):
+        self.engine = engine
+        self.steps = list(steps)
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.rtf_high = rtf_high
+        self.rtf_low = rtf_low
+        self.patience = patience
+        self.recovery = recovery
+        self.capture_nice = capture_nice
+        self.decoder_nice = decoder_nice
+        self.cpu = CpuSampler()
+        self.applied = []  # Names of the steps taken, in order
+        self.overloaded_checks = 0
+        self.relaxed_checks = 0
+        self.degradations = 0
+        self.last_cpu = None
+        self.last_rtf = None
+        self.priorities_applied = None
+        self._last_recognize = (engine.recognize_seconds, engine.recognizer_seconds)
+
+    def apply_priorities(self):
+        # Call after engine.start(): the engine starts new threads for every session
+        engine = self.engine
+        decoder_threads = [engine.processing_thread]
+        if engine.pipeline is not None:
+            decoder_threads += [stage.thread for stage in engine.pipeline.stages]
+        lowered = all([set_thread_nice(thread, self.decoder_nice) for thread in decoder_threads if thread is not None])
+        raised = set_thread_nice(engine.recording_thread, self.capture_nice)
+        self.priorities_applied = {"decoder": lowered, "capture": raised}
+        return self.priorities_applied
+
+    def real_time_factor(self):
+        # None while no audio was recognized since the last call
+        engine = self.engine
+        busy, audio = engine.recognize_seconds, engine.recognizer_seconds
+        last_busy, last_audio = self._last_recognize
+        self._last_recognize = (busy, audio)
+        if audio < last_audio:  # Recognizer swapped, its clock restarted
+            return None
+        if audio - last_audio <= 0:
+            return None
+        return (busy - last_busy) / (audio - last_audio)
+
+    def check(self):
+        # Returns the name of the step taken or restored, None if nothing changed. Only a running
+        # session degrades; restoring also happens while idle.
+        cpu = self.last_cpu = self.cpu.sample()
+        rtf = self.last_rtf = self.real_time_factor()
+        overloaded = self.engine.is_busy() and (self.engine.falling_behind or (rtf is not None and rtf >= self.rtf_high)
+                                                or (cpu is not None and cpu >= self.cpu_high))
+        relaxed = (not self.engine.falling_behind and (rtf is None or rtf < self.rtf_low)
+                   and (cpu is None or cpu < self.cpu_low))
+        if overloaded:
+            self.relaxed_checks = 0
+            self.overloaded_checks += 1
+            if self.overloaded_checks >= self.patience:
+                self.overloaded_checks = 0
+                return self.degrade()
+        elif relaxed:
+            self.overloaded_checks = 0
+            self.relaxed_checks += 1
+            if self.relaxed_checks >= self.recovery and self.applied:
+                self.relaxed_checks = 0
+                return self.restore()
+        else:
+            self.overloaded_checks = self.relaxed_checks = 0
+        return None
+
+    def degrade(self):
+        # Takes the next step that applies; returns its name, None when everything is degraded
+        for name, degrade, _ in self.steps:
+            if name in self.applied:
+                continue
+            if degrade() is not False:
+                self.applied.append(name)
+                self.degradations += 1
+                return name
+        return None
+
+    def restore(self):
+        name = self.applied.pop()
+        for step_name, _, restore in self.steps:
+            if step_name == name:
+                restore()
+        return name
+
+    def stats(self):
+        return {"governor_degraded": list(self.applied), "governor_degradations": self.degradations,
+                "governor_cpu": self.last_cpu, "governor_rtf": self.last_rtf}
@@ -0,0 +1,85 @@
+import tkinter as tk
+from tkinter import filedialog, ttk
+
+from audio_buffer import QUEUE_POLICIES
+
+# (config key, label, widget) where widget is "entry", "check", "combo", "model" or a tuple of choices.
+# "combo" is an editable list of suggestions from the choices passed to the dialog; "model" is a
+# combo with a Browse button for model directories elsewhere.
+SETTINGS_FIELDS = [
+    ("model", "Model", "model"),
+    ("model_memory_budget_mb", "Model memory budget (MB)", "entry"),
+    ("idle_unload_minutes", "Unload model when idle (min, 0 = never)", "entry"),
+    ("input_device", "Input device (empty = fastest probed)", "combo"),
+    ("silence_threshold", "Silence threshold", "entry"),
+    ("max_silence_duration", "Max silence (s)", "entry"),
+    ("adaptive_endpointing", "Adaptive endpointing", "check"),
+    ("max_utterance_seconds", "Max utterance (s, 0 = off)", "entry"),
+    ("chunk_duration", "Chunk duration (s)", "entry"),
+    ("queue_max_chunks", "Queue size (chunks)", "entry"),
+    ("queue_policy", "Queue policy", QUEUE_POLICIES),
+    ("denoise", "Noise gate", "check"),
+    ("noise_word_confidence", "Noise word confidence (0 = off)", "entry"),
+    ("max_history_entries", "History entries", "entry"),
+]
+
+
+class SettingsDialog(tk.Toplevel):
+    # Edits a copy of the config values; on_save(values) gets the raw widget values and may raise
+    # ValueError, which is shown in the dialog instead of closing it.
+    def __init__(self, parent, values, on_save, bg="#333333", fg="#E0B0FF", button_bg="#555555", choices=None):
+        super().__init__(parent)
+        self.title("Settings")
+        self.configure(bg=bg)
+        self.transient(parent)
+        self.on_save = on_save
+        self.variables = {}
+
+        label_style = {"bg": bg, "fg": fg, "font": ("TkDefaultFont", 11)}
+        button_style = {"bg": button_bg, "fg": fg, "activebackground": button_bg, "activeforeground": fg}
+        for row, (key, label, widget) in enumerate(SETTINGS_FIELDS):
+            tk.Label(self, text=label, anchor="w", **label_style).grid(row=row, column=0, padx=10, pady=4, sticky="w")
+            value = values.get(key)
+            if widget == "check":
+                variable = tk.BooleanVar(value=bool(value))
+                tk.Checkbutton(self, variable=variable, bg=bg, activebackground=bg, selectcolor=button_bg).grid(
+                    row=row, column=1, padx=10, sticky="w")
+            elif isinstance(widget, tuple):
+                variable = tk.StringVar(value=value)
+                menu = tk.OptionMenu(self, variable, *widget)
+                menu.config(highlightthickness=0, **button_style)
+                menu.grid(row=row, column=1, padx=10, sticky="ew")
+            elif widget in ("combo", "model"):
+                variable = tk.StringVar(value=value)
+                ttk.Combobox(self, textvariable=variable, values=list((choices or {}).get(key, ())), width=34).grid(
+                    row=row, column=1, padx=10, sticky="ew")
+                if widget == "model":
+                    tk.Button(self, text="Browse...", command=lambda v=variable: self.browse(v), **button_style).grid(
+                        row=row, column=2, padx=(0, 10))
+            else:
+                variable = tk.StringVar(value="" if value is None else str(value))
+                tk.Entry(self, textvariable=variable, width=36, bg=button_bg, fg=fg, insertbackground=fg).grid(
+                    row=row, column=1, padx=10, sticky="ew")
+            self.variables[key] = variable
+
+        self.error_label = tk.Label(self, text="", bg=bg, fg="red", wraplength=400, justify="left")
+        self.error_label.grid(row=len(SETTINGS_FIELDS), column=0, columnspan=3, padx=10, sticky="w")
+        button_row = tk.Frame(self, bg=bg)
+        button_row.grid(row=len(SETTINGS_FIELDS) + 1, column=0, columnspan=3, pady=10)
+        tk.Button(button_row, text="Save", command=self.save, **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_row, text="Cancel", command=self.destroy, **button_style).pack(side=tk.LEFT, padx=5)
+        self.bind("<Return>", lambda event: self.save())
+        self.bind("<Escape>", lambda event: self.destroy())
+
+    def browse(self, variable):
+        path = filedialog.askdirectory(parent=self, initialdir=variable.get() or ".")
+        if path:
+            variable.set(path)
+
+    def save(self):
+        try:
+            self.on_save({key: variable.get() for key, variable in self.variables.items()})
+        except ValueError as e:
+            self.error_label.config(text=str(e))
+            return
+        self.destroy()
@@ -0,0 +1,183 @@
+import atexit
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from audio_sources import AudioSource, MicrophoneSource
+
+# Header slots (int64) at the start of the shared block. There is exactly one writer (the
+# capture process) and one reader (the recognizer side), so each position has a single owner:
+# the writer publishes samples before advancing WRITE_POS, the reader copies them out before
+# advancing READ_POS. Positions count frames since start and never wrap; the data index is
+# position % capacity.
+WRITE_POS = 0
+READ_POS = 1
+OVERFLOWS = 2  # Blocks the writer dropped because the reader was a full buffer behind
+SESSION_REQUESTED = 3  # Written by the reader each time it asks for capture to start
+SESSION_ENDED = 4  # Written by the capture process when the stream for a session has closed
+HEADER_SLOTS = 5
+HEADER_BYTES = HEADER_SLOTS * 8
+
+
+class SharedAudioRing:
+    def __init__(self, capacity, name=None):
+        # capacity in frames; name=None creates a new block, otherwise attaches to an existing one
+        self.capacity = capacity
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=HEADER_BYTES + capacity * 2)
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity,), dtype=np.int16, buffer=self.shm.buf, offset=HEADER_BYTES)
+        if create:
+            # Spawned children share this process's resource tracker, so the creator's unlink()
+            # is the single cleanup point for the block
+            self.header[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def available(self):
+        return int(self.header[WRITE_POS] - self.header[READ_POS])
+
+    def write(self, samples):
+        # Returns False (and counts an overflow) if the block does not fit
+        samples = samples.reshape(-1)
+        write_pos = int(self.header[WRITE_POS])
+        if write_pos + len(samples) - int(self.header[READ_POS]) > self.capacity:
+            self.header[OVERFLOWS] += 1
+            return False
+        start = write_pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.header[WRITE_POS] = write_pos + len(samples)
+        return True
+
+    def read(self, frames):
+        read_pos = int(self.header[READ_POS])
+        frames = min(frames, int(self.header[WRITE_POS]) - read_pos)
+        start = read_pos % self.capacity
+        first = min(frames, self.capacity - start)
+        samples = np.concatenate((self.data[start:start + first], self.data[:frames - first]))
+        self.header[READ_POS] = read_pos + frames
+        return samples
+
+    def close(self):
+        # Drop the numpy views first, SharedMemory refuses to close while they are exported
+        del self.header, self.data
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def capture_main(ring_name, capacity, samplerate, blocksize, source_factory, data_ready, capture_event, shutdown_event):
+    # Runs in the capture process for the whole life of the app. The input stream is only open
+    # while capture_event is set; each open/close cycle serves one or more requested sessions.
+    ring = SharedAudioRing(capacity, name=ring_name)
+    try:
+        while not shutdown_event.is_set():
+            if not capture_event.wait(0.2):
+                continue
+            session = int(ring.header[SESSION_REQUESTED])
+            try:
+                with source_factory(samplerate) as source:
+                    while capture_event.is_set() and not shutdown_event.is_set():
+                        # A stop/start pair that arrives while the stream is open just continues it
+                        session = int(ring.header[SESSION_REQUESTED])
+                        audio_chunk = source.read(blocksize)[0]
+                        if len(audio_chunk):
+                            ring.write(audio_chunk)
+                            data_ready.release()
+                        if len(audio_chunk) < blocksize:
+                            break
+            except Exception as e:
+                print(f"Error in capture process: {e}")
+            ring.header[SESSION_ENDED] = session
+            data_ready.release()
+            # A finite source (or a failed device) ended by itself: wait for the next request
+            while capture_event.is_set() and int(ring.header[SESSION_REQUESTED]) == session and not shutdown_event.is_set():
+                time.sleep(0.05)
+    finally:
+        ring.close()
+
+
+def microphone_factory(samplerate):
+    return MicrophoneSource(samplerate)
+
+
+class SharedMemoryCapture(AudioSource):
+    # Audio source whose capture loop runs in a separate process, so the PortAudio reads never
+    # wait on this interpreter's GIL. Audio crosses over a shared-memory ring and only a
+    # semaphore release per block is signalled, no chunk is ever pickled.
+    #
+    # One instance lives for the whole app and is reused as the source of every session: the
+    # process is spawned once (start_process() can pre-warm it), open()/close() only start and
+    # stop the input stream inside it. source_factory must be picklable (a module-level function).
+    def __init__(self, samplerate=16000, blocksize=None, buffer_seconds=10.0, source_factory=microphone_factory):
+        super().__init__(samplerate)
+        self.blocksize = blocksize or samplerate // 100  # 10 ms blocks keep the hand-off latency low
+        self.capacity = int(buffer_seconds * samplerate)
+        self.source_factory = source_factory
+        self._context = multiprocessing.get_context("spawn")  # Never fork a process that owns Tk threads
+        self._ring = None
+        self._process = None
+        self._session = 0
+        self._overflows_seen = 0
+
+    def start_process(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._ring is None:
+            self._ring = SharedAudioRing(self.capacity)
+            atexit.register(self.shutdown)
+        self._data_ready = self._context.Semaphore(0)
+        self._capture_event = self._context.Event()
+        self._shutdown_event = self._context.Event()
+        self._process = self._context.Process(
+            target=capture_main, name="capture-process", daemon=True,
+            args=(self._ring.name, self.capacity, self.samplerate, self.blocksize, self.source_factory,
+                  self._data_ready, self._capture_event, self._shutdown_event))
+        self._process.start()
+
+    def open(self):
+        self.start_process()
+        # Audio left over from the previous session is stale
+        self._ring.header[READ_POS] = self._ring.header[WRITE_POS]
+        self._session += 1
+        self._ring.header[SESSION_REQUESTED] = self._session
+        self._capture_event.set()
+
+    def read(self, frames):
+        # Block until frames are available or this session's stream has closed
+        while self._ring.available() < frames and int(self._ring.header[SESSION_ENDED]) < self._session:
+            if not self._data_ready.acquire(timeout=0.5) and not self._process.is_alive():
+                break
+        overflows = int(self._ring.header[OVERFLOWS])
+        overflowed = overflows != self._overflows_seen
+        self._overflows_seen = overflows
+        return self._ring.read(frames).reshape(-1, 1), overflowed
+
+    def close(self):
+        # Stops the input stream; the process stays up for the next session
+        if self._process is not None:
+            self._capture_event.clear()
+
+    def overflow_count(self):
+        return int(self._ring.header[OVERFLOWS]) if self._ring is not None else self._overflows_seen
+
+    def shutdown(self):
+        if self._process is not None:
+            self._shutdown_event.set()
+            self._process.join(2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._ring is not None:
+            self._overflows_seen = int(self._ring.header[OVERFLOWS])
+            self._ring.close()
+            self._ring.unlink()
+            self._ring = None
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+# Building blocks for running the steps of the audio pipeline on their own threads. A Stage
+# takes items from its upstream (anything with get(): a queue, the audio buffer, another
+# stage), applies process(item) and puts the result in its own bounded queue, so a slow stage
+# holds back the stages before it instead of letting memory grow. None is the end-of-stream
+# marker: it is passed downstream in order and ends the stage's thread. One thread per stage
+# keeps items in order; work that does not have to be in order can be split into more stages.
+
+DROP = object()  # Returned by process to filter an item out (a VAD gate, a deduplicator)
+
+
+class Stage:
+    def __init__(self, name, process, upstream, maxsize=16, terminal=False, on_error=None):
+        # A terminal stage (a sink) keeps no output queue; its results are discarded
+        self.name = name
+        self.process = process
+        self.upstream = upstream
+        self.terminal = terminal
+        self.on_error = on_error
+        self.output = queue.Queue(maxsize)
+        self.items = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queued = 0
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+        return self
+
+    def get(self, block=True, timeout=None):
+        return self.output.get(block, timeout)
+
+    def get_nowait(self):
+        return self.output.get_nowait()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stats(self):
+        return {
+            "items": self.items,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_seconds": self.busy_seconds,
+            "mean_ms": self.busy_seconds / self.items * 1000 if self.items else 0.0,
+            "max_queued": self.max_queued,
+        }
+
+    def _run(self):
+        try:
+            while True:
+                item = self.upstream.get()
+                if item is None:
+                    break
+                started = time.perf_counter()
+                try:
+                    result = self.process(item)
+                except Exception as e:
+                    # One bad item must not stall everything behind the stage
+                    self.errors += 1
+                    if self.on_error:
+                        self.on_error(e)
+                    continue
+                finally:
+                    self.busy_seconds += time.perf_counter() - started
+                    self.items += 1
+                if result is DROP:
+                    self.dropped += 1
+                elif not self.terminal:
+                    self.output.put(result)
+                    self.max_queued = max(self.max_queued, self.output.qsize())
+        finally:
+            if not self.terminal:
+                self.output.put(None)
+
+
+class Pipeline:
+    # Stages chained in order behind source. steps is a list of (name, process); get() reads the
+    # output of the last stage, or the source itself when there are no steps.
+    def __init__(self, source, steps, maxsize=16, on_error=None):
+        self.stages = []
+        upstream = source
+        for name, process in steps:
+            upstream = Stage(name, process, upstream, maxsize, on_error=on_error)
+            self.stages.append(upstream)
+        self.output = upstream
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def get(self, block=True, timeout=None):
+        return self.output.get(block, timeout)
+
+    def get_nowait(self):
+        return self.output.get(block=False)
+
+    def join(self, timeout=None):
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
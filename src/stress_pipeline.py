@@ -0,0 +1,122 @@
+import argparse
+import random
+import sys
+import threading
+import time
+
+from audio_sources import SyntheticSource
+from dictation_engine import DictationEngine
+from fake_recognizer import FakeRecognizer
+
+# Load-tests DictationEngine with a synthetic source and FakeRecognizer, no microphone or model needed.
+# Example: python stress_pipeline.py --sessions 50 --speed 100 --realtime-factor 0.02
+
+
+def build_script(rng, seconds):
+    script = []
+    total = 0.0
+    while total < seconds:
+        speech = rng.uniform(0.5, 4.0)
+        silence = rng.uniform(0.3, 5.0)
+        script += [("speech", speech), ("silence", silence)]
+        total += speech + silence
+    return script
+
+
+def run_session(index, args, rng):
+    script = build_script(rng, args.seconds)
+    source = SyntheticSource(script, speed=args.speed, seed=index)
+    recognizer = FakeRecognizer(decode_delay=args.decode_delay, realtime_factor=args.realtime_factor)
+    engine = DictationEngine(recognizer, source_factory=lambda samplerate: source,
+                             max_silence_duration=args.max_silence, queue_max_chunks=args.queue_max_chunks,
+                             queue_policy=args.queue_policy, max_utterance_seconds=args.max_utterance)
+
+    finals = []
+    stopped = []
+    errors = []
+    stopped_event = threading.Event()
+    engine.on_final = lambda text, segment: finals.append(text)
+    engine.on_error = errors.append
+    engine.on_stopped = lambda stats: (stopped.append((time.monotonic(), stats)), stopped_event.set())
+
+    engine.start()
+    # Stop part of the sessions early to exercise stop/start while audio is still flowing
+    stop_at = rng.uniform(0.2, 1.0) * args.seconds / args.speed if rng.random() < args.early_stop else None
+    stop_requested = None
+    if stop_at is not None:
+        time.sleep(stop_at)
+        stop_requested = time.monotonic()
+        engine.stop()
+    completed = stopped_event.wait(args.timeout)
+
+    problems = list(f"capture error: {e}" for e in errors)
+    if not completed:
+        problems.append("processing did not finish before the timeout")
+    elif len(stopped) != 1:
+        problems.append(f"on_stopped called {len(stopped)} times")
+    stats = stopped[0][1] if stopped else engine.stats()
+    # A stop flushes the remaining queue with a single recognizer call
+    expected_calls = stats["processed"] - stats["flushed"] + (1 if stats["flushed"] else 0) + stats["refed"]
+    if completed and recognizer.accept_calls != expected_calls:
+        problems.append(f"recognizer saw {recognizer.accept_calls} chunks, engine processed {stats['processed']} "
+                        f"and re-fed {stats['refed']}")
+    if completed and stats["put"] != stats["processed"] + stats["dropped"] + stats["skipped_silence"] + stats["queued"]:
+        problems.append(f"queue accounting mismatch: {stats}")
+
+    stop_latency = stopped[0][0] - stop_requested if stopped and stop_requested else None
+    return {
+        "finals": len(finals),
+        "speech_sections": sum(1 for kind, _ in script if kind == "speech"),
+        "max_lag": stats["max_lag_seconds"],
+        "dropped": stats["dropped"] + stats["skipped_silence"],
+        "stop_latency": stop_latency,
+        "problems": problems,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress-test the capture/processing threads with synthetic audio")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60.0, help="audio seconds per session")
+    parser.add_argument("--speed", type=float, default=100.0, help="playback speed relative to real time")
+    parser.add_argument("--decode-delay", type=float, default=0.0, help="fake decode cost per chunk, seconds")
+    parser.add_argument("--realtime-factor", type=float, default=0.0, help="fake decode cost per audio second")
+    parser.add_argument("--max-silence", type=float, default=3.0)
+    parser.add_argument("--max-utterance", type=float, default=None, help="forced segmentation length, seconds")
+    parser.add_argument("--queue-max-chunks", type=int, default=50)
+    parser.add_argument("--queue-policy", default="skip_silence")
+    parser.add_argument("--early-stop", type=float, default=0.5, help="fraction of sessions stopped mid-stream")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    thread_errors = []
+    threading.excepthook = lambda hook_args: thread_errors.append(f"{hook_args.thread.name}: {hook_args.exc_value!r}")
+
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    results = []
+    for index in range(args.sessions):
+        result = run_session(index, args, rng)
+        results.append(result)
+        for problem in result["problems"]:
+            print(f"session {index}: {problem}")
+    elapsed = time.monotonic() - started
+
+    stop_latencies = sorted(r["stop_latency"] for r in results if r["stop_latency"] is not None)
+    print(f"{args.sessions} sessions, {args.sessions * args.seconds:.0f}s of audio in {elapsed:.1f}s")
+    print(f"finals: {sum(r['finals'] for r in results)} for {sum(r['speech_sections'] for r in results)} speech sections")
+    print(f"max queue lag: {max(r['max_lag'] for r in results):.1f}s audio, chunks shed: {sum(r['dropped'] for r in results)}")
+    if stop_latencies:
+        print(f"stop latency: median {1000 * stop_latencies[len(stop_latencies) // 2]:.1f}ms, "
+              f"max {1000 * stop_latencies[-1]:.1f}ms")
+    for error in thread_errors:
+        print(f"thread exception: {error}")
+
+    failed = thread_errors or any(r["problems"] for r in results)
+    print("FAILED" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
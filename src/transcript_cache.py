@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import wave
+
+CACHE_DIR = "~/.cache/vosk-dictation/transcripts"
+
+
+def audio_digest(path, block_frames=1 << 20):
+    # BLAKE2b of the PCM frames and format, so a re-encoded header or renamed file still hits
+    digest = hashlib.blake2b(digest_size=20)
+    with wave.open(path, "rb") as wav:
+        digest.update(f"{wav.getframerate()}:{wav.getsampwidth()}:{wav.getnchannels()}".encode())
+        while True:
+            data = wav.readframes(block_frames)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def model_identity(path):
+    # Name, size and modification time of every file in the model directory: a changed or
+    # replaced model gets a new identity without hashing gigabytes of model files
+    digest = hashlib.blake2b(digest_size=16)
+    path = os.path.realpath(path)
+    digest.update(path.encode())
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(os.path.join(root, name), path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    # Transcripts on disk, keyed by audio digest, model identity and the decoder settings that
+    # change the result. One JSON file per entry under a two-character fan-out directory.
+    # A hit refreshes the entry's mtime, and put() evicts by oldest mtime until the cache fits
+    # max_bytes, so the least recently used transcripts go first.
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=512 * 2**20):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(audio_digest, model_id, settings):
+        encoded = json.dumps({"audio": audio_digest, "model": model_id, "settings": settings}, sort_keys=True)
+        return hashlib.blake2b(encoded.encode(), digest_size=20).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"  # Several batch runs may share the cache
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def entries(self):
+        # (mtime, size, path) of every cached transcript
+        found = []
+        try:
+            buckets = list(os.scandir(self.cache_dir))
+        except OSError:
+            return found
+        for bucket in buckets:
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, stat.st_size, entry.path))
+        return found
+
+    def evict(self):
+        entries = sorted(self.entries())
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if used <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            used -= size
+            self.evictions += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,226 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app_config import CONFIG_PATH
+from audio_sources import WavFileSource
+from batch_transcribe import make_fake_recognizer_factory, make_vosk_recognizer_factory, read_wav
+from dictation_engine import DictationEngine
+from endpointing import AdaptiveEndpointer
+from noise_filter import NoiseWordFilter
+
+# Tunes the segmentation settings on your own recordings and hardware. Every combination of
+# silence threshold, end-of-segment silence and chunk duration is replayed through the same
+# engine vdic.py runs (endpointing, forced segmentation and noise filtering included), and
+# scored on three costs:
+#
+#   wer      word error rate against the reference transcript next to each WAV (name.txt)
+#   latency  seconds from the end of speech to its final result: the silence the engine waits
+#            for in audio time, plus one chunk of capture buffering, plus the wall time to decode
+#            a chunk on this machine
+#   cpu      CPU seconds per second of audio
+#
+# The settings no other setting beats on all three are printed as the Pareto front, and the
+# one with the lowest latency among those within --wer-tolerance of the best WER is written
+# as a config file vdic.py loads:
+#
+#   python tune_params.py corpus/ --output ~/.config/vosk-dictation/config.json
+#
+# Existing keys in the output file are kept. Decoding runs in --workers processes, one model
+# each; CPU is measured per process, so it stays comparable with any number of workers.
+
+SILENCE_THRESHOLDS = [50, 100, 200, 400]
+MAX_SILENCE_DURATIONS = [1.0, 2.0, 3.0, 4.0]
+CHUNK_DURATIONS = [0.05, 0.1, 0.2]
+MAX_UTTERANCE_SECONDS = 30.0  # As in vdic.py
+
+_recognizer_factory = None  # Set in each worker by init_worker
+
+
+def normalize_words(text):
+    # Vosk output is lower case without punctuation; make hand-written references match
+    return re.sub(r"[^\w' ]+", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    # Levenshtein distance over words: substitutions + deletions + insertions
+    previous = list(range(len(hypothesis) + 1))
+    for index, ref_word in enumerate(reference, 1):
+        current = [index]
+        for hyp_index, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[hyp_index] + 1, current[hyp_index - 1] + 1,
+                               previous[hyp_index - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def load_corpus(paths):
+    # (wav path, reference words) for every WAV given directly or found in a directory
+    corpus = []
+    for path in paths:
+        wavs = sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True)) if os.path.isdir(path) else [path]
+        for wav in wavs:
+            label = os.path.splitext(wav)[0] + ".txt"
+            if not os.path.exists(label):
+                print(f"Skipping {wav}: no reference transcript {label}", file=sys.stderr)
+                continue
+            with open(label, encoding="utf-8") as f:
+                corpus.append((wav, normalize_words(f.read())))
+    return corpus
+
+
+def init_worker(model_name, fake_realtime_factor):
+    global _recognizer_factory
+    if fake_realtime_factor is not None:
+        _recognizer_factory = make_fake_recognizer_factory(fake_realtime_factor)
+    else:
+        _recognizer_factory = make_vosk_recognizer_factory(model_name)
+
+
+def replay(task):
+    # Runs one file through the engine with one setting, without capture threads or pacing
+    path, setting, options = task
+    samplerate, frames = read_wav(path)
+    endpointer = AdaptiveEndpointer(max_delay=setting["max_silence_duration"]) if options["adaptive_endpointing"] else None
+    noise_filter = NoiseWordFilter(options["noise_word_confidence"]) if options["noise_word_confidence"] else None
+    engine = DictationEngine(_recognizer_factory(samplerate), samplerate, chunk_duration=setting["chunk_duration"],
+                             silence_threshold=setting["silence_threshold"],
+                             max_silence_duration=setting["max_silence_duration"],
+                             max_utterance_seconds=MAX_UTTERANCE_SECONDS, endpointer=endpointer,
+                             noise_filter=noise_filter)
+    finals = []
+    engine.on_final = lambda text, segment: finals.append(text)
+    chunks = 0  # process_chunk is called directly, so engine.chunks_processed stays 0
+    started = time.process_time()
+    wall_started = time.perf_counter()
+    with WavFileSource(path, samplerate) as source:
+        while True:
+            audio_chunk = source.read(engine.chunk_size)[0]
+            if len(audio_chunk) == 0:
+                break
+            engine.process_chunk(audio_chunk)
+            chunks += 1
+    engine.finish_utterance()
+    cpu_seconds = time.process_time() - started
+    return {"hypothesis": normalize_words(" ".join(finals)), "cpu_seconds": cpu_seconds,
+            "decode_seconds": time.perf_counter() - wall_started, "audio_seconds": frames / samplerate,
+            "chunks": chunks, "final_latencies": list(engine.final_latencies)}
+
+
+def score(setting, corpus, results):
+    errors = sum(word_errors(reference, result["hypothesis"]) for (_, reference), result in zip(corpus, results))
+    reference_words = sum(len(reference) for _, reference in corpus)
+    cpu_seconds = sum(result["cpu_seconds"] for result in results)
+    audio_seconds = sum(result["audio_seconds"] for result in results)
+    chunks = sum(result["chunks"] for result in results)
+    latencies = [latency for result in results for latency in result["final_latencies"]]
+    decode_seconds = sum(result["decode_seconds"] for result in results) / chunks if chunks else 0.0
+    endpoint_seconds = sum(latencies) / len(latencies) if latencies else setting["max_silence_duration"]
+    return dict(setting, wer=errors / max(1, reference_words), cpu=cpu_seconds / max(audio_seconds, 1e-9),
+                latency=endpoint_seconds + setting["chunk_duration"] + decode_seconds)
+
+
+def pareto_front(scores, costs=("wer", "latency", "cpu")):
+    def dominates(a, b):
+        return all(a[cost] <= b[cost] for cost in costs) and any(a[cost] < b[cost] for cost in costs)
+    return [score for score in scores if not any(dominates(other, score) for other in scores)]
+
+
+def pick(front, wer_tolerance):
+    best_wer = min(score["wer"] for score in front)
+    candidates = [score for score in front if score["wer"] <= best_wer + wer_tolerance]
+    return min(candidates, key=lambda score: (score["latency"], score["cpu"], score["wer"]))
+
+
+def write_config(path, values):
+    # Merge into an existing config so model, device and UI settings survive; same atomic
+    # write as AppConfig.save
+    path = os.path.expanduser(path)
+    stored = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+    stored.update(values)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def float_list(value):
+    return [float(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep segmentation settings over a labelled WAV corpus and "
+                                                 "write the best accuracy/latency trade-off as a config file")
+    parser.add_argument("corpus", nargs="+", help="16-bit mono WAV files or directories, each WAV with a name.txt reference")
+    parser.add_argument("--model", default="vosk-model-en-us-0.22", help="model directory name under models/, or a path")
+    parser.add_argument("--silence-thresholds", type=float_list, default=SILENCE_THRESHOLDS, help="comma-separated")
+    parser.add_argument("--max-silence", type=float_list, default=MAX_SILENCE_DURATIONS,
+                        help="comma-separated end-of-segment silences, seconds")
+    parser.add_argument("--chunk-durations", type=float_list, default=CHUNK_DURATIONS, help="comma-separated, seconds")
+    parser.add_argument("--fixed-endpointing", action="store_true", help="tune without adaptive endpointing")
+    parser.add_argument("--noise-word-confidence", type=float, default=0.5, help="0 = no noise word filter")
+    parser.add_argument("--wer-tolerance", type=float, default=0.005,
+                        help="WER above the best that may be traded for lower latency")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="decoding processes")
+    parser.add_argument("--fake", type=float, metavar="REALTIME_FACTOR",
+                        help="use the fake recognizer with this decode cost per second of audio, for testing the tool")
+    parser.add_argument("--output", help=f"config file to write the chosen settings to, e.g. {CONFIG_PATH}")
+    parser.add_argument("--jsonl", action="store_true", help="print every setting's scores as JSON lines")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error("no labelled WAV files found")
+    settings = [{"silence_threshold": int(threshold), "max_silence_duration": max_silence, "chunk_duration": chunk}
+                for threshold, max_silence, chunk in itertools.product(args.silence_thresholds, args.max_silence,
+                                                                       args.chunk_durations)]
+    options = {"adaptive_endpointing": not args.fixed_endpointing, "noise_word_confidence": args.noise_word_confidence}
+    tasks = [(path, setting, options) for setting in settings for path, _ in corpus]
+    audio_seconds = sum(frames / samplerate for samplerate, frames in (read_wav(path) for path, _ in corpus))
+    print(f"{len(corpus)} files, {audio_seconds:.0f}s of audio, {len(settings)} settings", file=sys.stderr)
+
+    started = time.perf_counter()
+    workers = max(1, min(args.workers, len(tasks)))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(args.model, args.fake)) as pool:
+        results = list(pool.map(replay, tasks))
+    scores = [score(setting, corpus, results[index * len(corpus):(index + 1) * len(corpus)])
+              for index, setting in enumerate(settings)]
+    print(f"Replayed in {time.perf_counter() - started:.1f}s with {workers} workers", file=sys.stderr)
+
+    front = sorted(pareto_front(scores), key=lambda score: score["wer"])
+    chosen = pick(front, args.wer_tolerance)
+    if args.jsonl:
+        for entry in scores:
+            print(json.dumps(dict(entry, pareto=entry in front, chosen=entry is chosen)), flush=True)
+    else:
+        print("Pareto front (threshold, max silence, chunk: WER, latency, CPU):")
+        for entry in front:
+            marker = "*" if entry is chosen else " "
+            print(f"{marker} {entry['silence_threshold']:5d}, {entry['max_silence_duration']:4.1f}s, "
+                  f"{entry['chunk_duration']:.2f}s: {entry['wer']:6.1%}, {entry['latency']:5.2f}s, {entry['cpu']:.3f}")
+
+    values = {key: chosen[key] for key in ("silence_threshold", "max_silence_duration", "chunk_duration")}
+    values["adaptive_endpointing"] = options["adaptive_endpointing"]
+    values["noise_word_confidence"] = args.noise_word_confidence
+    if args.fake is None:
+        values["model"] = os.path.basename(os.path.normpath(args.model))
+    if args.output:
+        write_config(args.output, values)
+        print(f"Wrote {', '.join(f'{key}={value}' for key, value in sorted(values.items()))} to {args.output}",
+              file=sys.stderr)
+    else:
+        print(json.dumps(values, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
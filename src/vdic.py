@@ -1,15 +1,31 @@
+import resource_governor
+resource_governor.limit_decoder_threads()  # Has to happen before vosk loads Kaldi's BLAS
 import vosk
-import json
-import sounddevice as sd
-import numpy as np
 import pyperclip
 import tkinter as tk
 from tkinter import scrolledtext, PanedWindow, VERTICAL, HORIZONTAL
-import threading
 import time
-import queue
 import os
+import sys
+import threading
 from collections import deque
+from functools import partial
+
+from app_config import AppConfig
+from audio_sources import MicrophoneSource
+from control_socket import ControlServer, send_command
+from denoise import StreamingDenoiser
+from device_probe import list_input_devices, remembered_input
+from dictation_engine import DictationEngine
+from endpointing import AdaptiveEndpointer
+from model_registry import ModelRegistry, resident_memory
+from noise_filter import NoiseWordFilter
+from output_sinks import SinkDispatcher
+from profiler import SamplingProfiler
+from resource_governor import ResourceGovernor
+from settings_dialog import SettingsDialog
+from shm_capture import SharedMemoryCapture
+from word_store import WordStore
 
 # Path to your model
 # Check if the model path exists relative to the script or the current working directory
@@ -17,6 +33,11 @@ MODEL_PATH_RELATIVE = "../models/vosk-model-en-us-0.22"
 MODEL_PATH_CWD = os.path.join(os.path.dirname(__file__), MODEL_PATH_RELATIVE)
 
 MODEL_PATH = MODEL_PATH_CWD if os.path.exists(MODEL_PATH_CWD) else MODEL_PATH_RELATIVE
+MODELS_DIR = os.path.dirname(MODEL_PATH) # Every model directory in here can be picked in Settings
+MODEL_MEMORY_BUDGET_MB = 4096 # Loaded models are kept for instant switching up to this total size
+IDLE_UNLOAD_MINUTES = 20 # Free the model's memory after this long without recording; 0 keeps it loaded
+IDLE_CHECK_MS = 30000
+INPUT_DEVICE = "" # "name, host API" as listed by device_probe.py --list; empty uses the device device_probe.py found fastest
 
 # Styling
 BG_COLOR = "#333333" # Dark grey background
@@ -25,11 +46,63 @@ BUTTON_BG = "#555555"
 BUTTON_FG = "#E0B0FF"
 STATUS_FG = "#90EE90" # Light green for status
 EMPTY_TEXT_COLOR = "#888888" # Grey for "say something"
+LOW_CONFIDENCE_FG = "#FFA500" # Orange for words the recognizer was unsure about
+UNSTABLE_PARTIAL_FG = "#B090C0" # Dimmed mauve for the tail of a partial that may still change
 
 # Constants
 MAX_HISTORY_ENTRIES = 6
 SILENCE_THRESHOLD = 100 # Adjust threshold as needed
+CHUNK_DURATION = 0.1 # Seconds of audio handed to the recognizer at a time
 MAX_SILENCE_DURATION = 3 # Seconds of silence before saving to history
+AUDIO_QUEUE_MAX_CHUNKS = 50 # 5 seconds of audio at 100 ms chunks
+AUDIO_QUEUE_POLICY = "skip_silence" # "block", "drop_oldest" or "skip_silence"
+LAG_WARNING_SECONDS = 1.5 # Backlog above which the status shows "Falling behind"
+CAPTURE_IN_PROCESS = False # Capture in a separate process over shared memory, immune to UI/GIL stalls
+DENOISE_ENABLED = False # Spectral noise gate ahead of the recognizer, for fan and hum noise
+MAX_UTTERANCE_SECONDS = 30 # Force a segment boundary in long unbroken speech to keep partials responsive
+ADAPTIVE_ENDPOINTING = True # Learn the end-of-segment silence from your own pauses, up to MAX_SILENCE_DURATION
+NOISE_WORD_CONFIDENCE = 0.5 # Words below this confidence over quiet audio or at a segment edge are dropped as noise; 0 = off
+RESOURCE_GOVERNOR = True # Lower the decoder's priority and shed work while the machine is saturated or recognition lags
+GOVERNOR_CHECK_MS = 2000
+START_POLL_MS = 50 # How often a Record press during processing checks whether it can start
+DEGRADED_PARTIAL_INTERVAL = 0.5 # Seconds of audio between partials while degraded
+FALLBACK_MODEL = "vosk-model-small-en-us-0.15" # Last resort while degraded, if present in MODELS_DIR; "" never switches
+LAG_WARNING_FG = "orange"
+LOW_CONFIDENCE_THRESHOLD = 0.6 # Words below this Vosk confidence are highlighted
+PROFILE_SECONDS = 30 # Length of an on-demand profiler capture (Ctrl+P)
+PROFILE_DIR = "~/.cache/vosk-dictation/profiles" # Collapsed stacks for flamegraph.pl / speedscope
+OUTPUT_SINKS = [] # Extra outputs for final results, e.g. ["type", "file:~/dictation.txt", "fifo:/tmp/vdic", "stdout"]
+
+# Settings editable in the Settings dialog; values saved in ~/.config/vosk-dictation/config.json override these
+CONFIG_DEFAULTS = {
+    "model": os.path.basename(MODEL_PATH),
+    "model_memory_budget_mb": MODEL_MEMORY_BUDGET_MB,
+    "silence_threshold": SILENCE_THRESHOLD,
+    "max_silence_duration": float(MAX_SILENCE_DURATION),
+    "adaptive_endpointing": ADAPTIVE_ENDPOINTING,
+    "max_utterance_seconds": float(MAX_UTTERANCE_SECONDS or 0),
+    "chunk_duration": CHUNK_DURATION,
+    "queue_max_chunks": AUDIO_QUEUE_MAX_CHUNKS,
+    "queue_policy": AUDIO_QUEUE_POLICY,
+    "denoise": DENOISE_ENABLED,
+    "noise_word_confidence": NOISE_WORD_CONFIDENCE,
+    "max_history_entries": MAX_HISTORY_ENTRIES,
+    "idle_unload_minutes": float(IDLE_UNLOAD_MINUTES),
+    "input_device": INPUT_DEVICE,
+}
+
+def stable_prefix_length(old, new):
+    # Length of the common prefix of two hypotheses, cut back to a word boundary so a word that
+    # is still changing ("the" -> "then") is replaced as a whole
+    limit = min(len(old), len(new))
+    index = 0
+    while index < limit and old[index] == new[index]:
+        index += 1
+    if index == len(old) == len(new):
+        return index
+    if index < limit or (index < len(new) and new[index] != " ") or (index < len(old) and old[index] != " "):
+        index = old.rfind(" ", 0, index) + 1
+    return index
 
 class DictationApp:
     def __init__(self, root):
@@ -39,42 +112,36 @@ class DictationApp:
         self.root.configure(bg=BG_COLOR)
 
         # Setup variables
+        self.config = AppConfig(CONFIG_DEFAULTS).load()
         self.is_recording = False
-        self.text_history = deque(maxlen=MAX_HISTORY_ENTRIES)
+        self.text_history = deque(maxlen=self.config["max_history_entries"])
+        self.history_segments = deque(maxlen=self.config["max_history_entries"]) # WordStore segment per history entry, None if unknown
+        self.word_store = WordStore() # Word timings and confidences for every final result
         self.history_position = -1 # Index in deque, -1 means active_text is not from history
+        self.rendered_partial = None # Partial hypothesis shown in active_text, None if it shows something else
+        self.stable_chars = 0 # Leading characters of rendered_partial not tagged "unstable"
         self.silence_timer = 0
         self.last_speech_time = time.time()
-        self.audio_queue = queue.Queue()
         self.edit_mode = False
         self.restore_text = ""
         self.clipboard_controlled_by_app = True # Flag to manage clipboard control
+        self.output_sinks = SinkDispatcher.from_specs(OUTPUT_SINKS) # Written asynchronously, never stalls recognition
+        self.profiler = SamplingProfiler(PROFILE_DIR)
+        self.settings_dialog = None
+        self.samplerate = 16000
+        self.shared_capture = None
+        self.engine = None
+        self.models = ModelRegistry(MODELS_DIR, self.config["model_memory_budget_mb"] * 2**20)
+        self.last_activity = time.monotonic()
+        self.model_unloaded = False
+        self.model_loading = False
+        self.start_when_loaded = False # Record was clicked while the model was being reloaded
+        self.start_when_stopped = False # Record was clicked while the previous session was still draining
+        self.governor = None
 
         # Create UI
         self.create_widgets()
 
-        # Setup Vosk
-        try:
-            if not os.path.exists(MODEL_PATH):
-                 raise FileNotFoundError(f"Vosk model not found at {MODEL_PATH}")
-            self.model = vosk.Model(MODEL_PATH)
-        except Exception as e:
-            print(f"Error loading Vosk model: {e}")
-            print(f"Please ensure the model is downloaded and the path is correct: {MODEL_PATH}")
-            self.status_label.config(text=f"Error: {e}", fg="red")
-            # Disable buttons if model fails to load
-            self.toggle_button.config(state=tk.DISABLED)
-            self.edit_save_button.config(state=tk.DISABLED)
-            self.settings_button.config(state=tk.DISABLED) # Settings button initially visible
-            return
-
-        self.samplerate = 16000
-        self.recognizer = vosk.KaldiRecognizer(self.model, self.samplerate)
-
-        # Start audio processing thread
-        self.processing_thread = threading.Thread(target=self.process_audio)
-        self.processing_thread.daemon = True
-        self.processing_thread.start()
-
         # Bind keyboard shortcuts and focus events
         self.active_text.bind('<FocusIn>', self.on_active_text_focus)
         self.active_text.bind('<FocusOut>', self.on_active_text_unfocus)
@@ -84,11 +151,128 @@ class DictationApp:
         self.active_text.bind('<Right>', self.navigate_history_right)
         self.active_text.bind('<Control-c>', self.on_external_copy) # Detect Ctrl+C
         self.active_text.bind('<Button-3>', self.on_external_copy) # Detect Right Click (for paste context menu)
+        self.active_text.bind('<Control-j>', self.jump_to_low_confidence_word)
+        self.root.bind('<Control-p>', self.toggle_profiler)
+        self.root.bind('<Control-m>', self.switch_to_previous_model)
+        # Hints that the user is about to dictate: reload an idle-unloaded model before Record is clicked
+        self.root.bind('<FocusIn>', self.note_activity, add="+")
+        self.toggle_button.bind('<Enter>', self.note_activity)
+
+        # Control socket for hotkeys and second launches (vdic_ctl.py toggle)
+        self.control = None
+        try:
+            self.control = ControlServer(self.control_handlers(), run=lambda function: self.root.after(0, function)).start()
+        except (FileExistsError, OSError) as e:
+            print(f"Control socket not available: {e}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Initial state
         self.update_history_display() # Display "say something" initially
         self.set_active_text_editable(False) # Start in non-edit mode
 
+        # Setup Vosk
+        model_name = self.config["model"]
+        try:
+            self.model = self.models.get(model_name)
+            self.models.set_active(model_name)
+        except Exception as e:
+            print(f"Error loading Vosk model: {e}")
+            print(f"Please ensure the model is downloaded and the path is correct: {self.models.resolve(model_name)}")
+            self.status_label.config(text=f"Error: {e}", fg="red")
+            # Disable buttons if model fails to load; Settings stays enabled so another model can be chosen
+            self.toggle_button.config(state=tk.DISABLED)
+            self.edit_save_button.config(state=tk.DISABLED)
+            return
+
+        self.create_engine(vosk.KaldiRecognizer(self.model, self.samplerate))
+
+    def create_engine(self, recognizer):
+        self.recognizer = recognizer
+        if CAPTURE_IN_PROCESS:
+            # The device is fixed for the life of the capture process; a change in Settings needs a restart
+            self.shared_capture = SharedMemoryCapture(self.samplerate,
+                                                      source_factory=partial(MicrophoneSource, **self.input_settings()))
+            self.shared_capture.start_process()  # Spawn now so the first Record click doesn't wait for it
+        config = self.config
+        self.engine = DictationEngine(self.recognizer, self.samplerate, chunk_duration=config["chunk_duration"],
+                                      silence_threshold=config["silence_threshold"],
+                                      max_silence_duration=config["max_silence_duration"],
+                                      queue_max_chunks=config["queue_max_chunks"], queue_policy=config["queue_policy"],
+                                      lag_warning_seconds=LAG_WARNING_SECONDS, word_store=self.word_store,
+                                      max_utterance_seconds=config["max_utterance_seconds"],
+                                      endpointer=self.make_endpointer(), denoiser=self.make_denoiser(),
+                                      noise_filter=self.make_noise_filter(),
+                                      source_factory=self.open_input)
+        # Engine callbacks arrive on the events thread, hand them to the Tk main loop
+        self.engine.on_partial = lambda text: self.root.after(0, self.update_active_text_display_only, text)
+        self.engine.on_final = lambda text, segment: self.root.after(0, self.on_final_result, text, segment)
+        self.engine.on_lag = lambda falling_behind, lag: self.root.after(0, self.show_lag_status, falling_behind, lag)
+        self.engine.on_stopped = lambda stats: self.root.after(0, self.on_processing_finished, stats)
+        self.engine.on_error = lambda e: self.root.after(0, self.on_recording_error, e)
+        self.root.after(IDLE_CHECK_MS, self.check_idle)
+        if RESOURCE_GOVERNOR:
+            self.governor = ResourceGovernor(self.engine, self.degradation_steps())
+            self.root.after(GOVERNOR_CHECK_MS, self.check_resources)
+
+    def input_settings(self):
+        # MicrophoneSource arguments: the device chosen in Settings, else the one device_probe.py measured fastest
+        if self.config["input_device"]:
+            return {"device": self.config["input_device"]}
+        return remembered_input()
+
+    def open_input(self, samplerate):
+        # Called by the engine at the start of every session, so a new input device applies from the next Record
+        if self.shared_capture:
+            return self.shared_capture
+        return MicrophoneSource(samplerate, **self.input_settings())
+
+    def make_endpointer(self):
+        if not self.config["adaptive_endpointing"]:
+            return None
+        return AdaptiveEndpointer(max_delay=self.config["max_silence_duration"])
+
+    def make_denoiser(self):
+        return StreamingDenoiser(self.samplerate) if self.config["denoise"] else None
+
+    def make_noise_filter(self):
+        confidence = self.config["noise_word_confidence"]
+        return NoiseWordFilter(confidence) if confidence else None
+
+    def degradation_steps(self):
+        # Cheapest first: fewer partials, then no denoise, then the smaller model
+        return [
+            ("partials", lambda: self.engine.configure(partial_interval=DEGRADED_PARTIAL_INTERVAL),
+             lambda: self.engine.configure(partial_interval=0.0)),
+            ("denoise", self.disable_denoise, lambda: self.engine.configure(denoiser=self.make_denoiser())),
+            ("model", self.switch_to_fallback_model, self.restore_configured_model),
+        ]
+
+    def disable_denoise(self):
+        if self.engine.denoiser is None:
+            return False
+        self.engine.configure(denoiser=None)
+
+    def switch_to_fallback_model(self):
+        if (not FALLBACK_MODEL or FALLBACK_MODEL == self.config["model"] or self.model_loading
+                or not os.path.isdir(self.models.resolve(FALLBACK_MODEL))):
+            return False
+        self.switch_model(FALLBACK_MODEL)
+
+    def restore_configured_model(self):
+        if not self.model_unloaded:  # Otherwise the configured model is loaded on the next activity anyway
+            self.switch_model(self.config["model"])
+
+    def check_resources(self):
+        if not self.model_unloaded:
+            step = self.governor.check()
+            if step is not None:
+                stats = self.governor.stats()
+                cpu = "?" if stats["governor_cpu"] is None else f"{stats['governor_cpu']:.0%}"
+                rtf = "?" if stats["governor_rtf"] is None else f"{stats['governor_rtf']:.2f}"
+                print(f"Resource governor: CPU {cpu}, real-time factor {rtf}, "
+                      f"degraded: {', '.join(stats['governor_degraded']) or 'nothing'}")
+        self.root.after(GOVERNOR_CHECK_MS, self.check_resources)
+
     def create_widgets(self):
         # Use a PanedWindow for the main left/right split
         main_paned_window = PanedWindow(self.root, orient=HORIZONTAL, bg=BG_COLOR, sashrelief=tk.RAISED)
@@ -109,6 +293,8 @@ class DictationApp:
         # Active Text area
         self.active_text = tk.Text(text_paned_window, wrap=tk.WORD, height=6, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR, selectbackground=BUTTON_BG, selectforeground="white", font=("TkDefaultFont", 14))
         text_paned_window.add(self.active_text, stretch="always")
+        self.active_text.tag_configure("low_conf", foreground=LOW_CONFIDENCE_FG, underline=True)
+        self.active_text.tag_configure("unstable", foreground=UNSTABLE_PARTIAL_FG)
 
         # History Below Text area
         self.history_below_text = tk.Text(text_paned_window, wrap=tk.WORD, height=3, state=tk.DISABLED, bg=BG_COLOR, fg=FG_COLOR, selectbackground=BUTTON_BG, selectforeground="white", font=("TkDefaultFont", 11))
@@ -143,16 +329,31 @@ class DictationApp:
         # Don't grid it initially, will grid when edit mode is active
 
     def toggle_recording(self):
-        if not hasattr(self, 'model'): # Check if model loaded successfully
+        if self.engine is None: # Check if model loaded successfully
             print("Vosk model not loaded. Cannot start recording.")
             return
+        if self.engine.recognizer is None:
+            # Unloaded while idle: start as soon as the reload finishes
+            self.start_when_loaded = True
+            self.note_activity()
+            return
 
         if not self.is_recording:
+            if self.engine.is_busy():
+                # Joining the draining session here would block the Tk thread its callbacks wait
+                # for; start_when_idle starts the new one once it is done (clicking again cancels)
+                self.start_when_stopped = not self.start_when_stopped
+                if self.start_when_stopped:
+                    self.root.after(START_POLL_MS, self.start_when_idle)
+                self.status_label.config(text="Starting after processing..." if self.start_when_stopped else "Processing...",
+                                         fg=STATUS_FG)
+                return
             self.start_recording()
         else:
             self.stop_recording()
 
     def start_recording(self):
+        self.last_activity = time.monotonic()
         if self.edit_mode:
             self.toggle_edit_mode() # Exit edit mode if active
 
@@ -165,142 +366,141 @@ class DictationApp:
         if current_active_text and (self.history_position == -1 or current_active_text != self.text_history[self.history_position]):
              # If active text is not the current history entry, clear it for new recording
              self.active_text.delete("1.0", tk.END)
+        # Whatever the widget shows now (a history entry, or the partial of a final the noise filter
+        # or a post-processor dropped), the first partial of this session replaces all of it
+        self.rendered_partial = None
 
         self.history_position = len(self.text_history) # Set position to end for new entry
 
-        # Start recording thread
-        self.recording_thread = threading.Thread(target=self.record_audio)
-        self.recording_thread.daemon = True
-        self.recording_thread.start()
+        # Start recording and processing threads
+        self.engine.start()
+        if self.governor is not None:
+            self.governor.apply_priorities()
 
     def stop_recording(self):
         self.is_recording = False
+        self.last_activity = time.monotonic()
         self.toggle_button.config(text="Record") # Change button text back to Record
         self.status_label.config(text="Processing...", fg=STATUS_FG) # Indicate processing might still happen
 
-        # Put a sentinel value in the queue to signal the processing thread to stop
-        self.audio_queue.put(None)
-
-    def record_audio(self):
-        try:
-            with sd.InputStream(samplerate=self.samplerate, channels=1, dtype='int16') as stream:
-                while self.is_recording:
-                    audio_chunk = stream.read(self.samplerate // 10)[0] # Read audio chunk (correct unpacking)
-                    self.audio_queue.put(audio_chunk)
-        except Exception as e:
-            print(f"Error during audio recording: {e}")
-            self.status_label.config(text=f"Recording Error: {e}", fg="red")
-            self.stop_recording() # Stop recording on error
-
-    def process_audio(self):
-        current_text = ""
-        silence_counter = 0
+        # The engine drains the queued audio and reports back through on_processing_finished
+        self.engine.stop()
+
+    def on_recording_error(self, e):
+        print(f"Error during audio recording: {e}")
+        self.status_label.config(text=f"Recording Error: {e}", fg="red")
+        if self.is_recording:
+            self.is_recording = False
+            self.toggle_button.config(text="Record")
+
+    def on_final_result(self, text, segment):
+        self.save_to_history(text, segment) # Save to history and update active text/clipboard
+        self.output_sinks.dispatch(text)
+
+    def on_processing_finished(self, stats):
+        print(f"Audio queue: max lag {stats['max_lag_seconds']:.1f}s, dropped {stats['dropped']}, "
+              f"skipped silence {stats['skipped_silence']}, blocked {stats['blocked_seconds']:.1f}s")
+        if "noise_dropped_segments" in stats:
+            print(f"Noise filter: {stats['noise_dropped_segments']} segments dropped (clipboard and history updates avoided), "
+                  f"{stats['noise_trimmed_words']} words trimmed, {stats['noise_suppressed_partials']} partials held back")
+        if "final_latency_mean" in stats:
+            print(f"Endpointing: speech end to final mean {stats['final_latency_mean']:.2f}s, "
+                  f"max {stats['final_latency_max']:.2f}s, silence timeout {self.engine.max_silence_duration:.2f}s")
+        if self.governor is not None and self.governor.degradations:
+            print(f"Resource governor: {self.governor.degradations} degradations, "
+                  f"currently degraded: {', '.join(self.governor.applied) or 'nothing'}")
+        for name, metrics in self.output_sinks.metrics().items():
+            print(f"Output sink {name}: {metrics['written']} written, {metrics['dropped']} dropped, "
+                  f"{metrics['errors']} errors, mean latency {metrics['mean_latency_ms']:.1f}ms")
+        # Ensure status is set to Idle after processing finishes, unless a new session already started
+        if not self.is_recording and not self.start_when_stopped and self.status_label.cget("fg") != "red":
+            self.status_label.config(text="Idle", fg=STATUS_FG)
+
+    def start_when_idle(self):
+        # Polled on the Tk thread after Record was pressed during processing, until every thread
+        # of the previous session has ended
+        if not self.start_when_stopped or self.is_recording:
+            return
+        if self.engine.is_busy():
+            self.root.after(START_POLL_MS, self.start_when_idle)
+            return
+        self.start_when_stopped = False
+        self.start_recording()
 
-        while True:
-            try:
-                # Get audio chunk with a small timeout
-                audio_chunk = self.audio_queue.get(timeout=0.1)
-                if audio_chunk is None: # Check for sentinel value
-                    break # Exit the loop if sentinel is received
-            except queue.Empty:
-                # If queue is empty, continue waiting unless recording has stopped
-                if not self.is_recording:
-                    # If recording has stopped and queue is empty, break the loop
-                    break
-                time.sleep(0.05) # Small sleep if queue is empty but still recording
-                continue # Continue loop to check queue again
-
-            # Process the audio
-            if self.recognizer.AcceptWaveform(audio_chunk.tobytes()):
-                # Final result received
-                result = json.loads(self.recognizer.Result())
-                if result["text"]:
-                    current_text = result["text"]
-                    self.save_to_history(current_text) # Save to history and update active text/clipboard
-                    current_text = "" # Clear current text for next segment
-                # Reset silence counter after a final result
-                silence_counter = 0
-            else:
-                # Partial result received
-                partial_result = json.loads(self.recognizer.PartialResult())
-                if partial_result["partial"]:
-                    current_text = partial_result["partial"]
-                    # Update active text thread-safely
-                    self.root.after(0, lambda text=current_text: self.update_active_text_display_only(text))
-
-                # Check if there's speech in this chunk (for silence detection)
-                energy = np.mean(np.abs(audio_chunk))
-                if energy > SILENCE_THRESHOLD:
-                    silence_counter = 0
-                    self.last_speech_time = time.time()
-                else:
-                    silence_counter += 1
-
-                # Check if silence exceeds threshold (only after processing partial results)
-                silence_duration = silence_counter * (self.samplerate // 10) / self.samplerate
-                if silence_duration > MAX_SILENCE_DURATION:
-                    if current_text:
-                        # If there's partial text and silence threshold is met, finalize it
-                        self.save_to_history(current_text)
-                        current_text = "" # Clear current text after saving
-                    # Reset silence counter
-                    silence_counter = 0
-
-
-        # After recording stops and queue is empty, process any final result
-        final_result = json.loads(self.recognizer.FinalResult())
-        if final_result["text"] and final_result["text"] != current_text:
-             self.save_to_history(final_result["text"])
-
-        # Ensure status is set to Idle after processing finishes
-        self.root.after(0, lambda: self.status_label.config(text="Idle", fg=STATUS_FG))
+    def show_lag_status(self, falling_behind, lag):
+        # Visible warning while the recognizer is behind real time
+        if falling_behind:
+            self.status_label.config(text=f"Falling behind ({lag:.1f}s)", fg=LAG_WARNING_FG)
+        else:
+            self.status_label.config(text="Listening..." if self.is_recording else "Processing...", fg=STATUS_FG)
 
     def update_active_text_display_only(self, text):
-         # Update active text display without affecting clipboard or history position
+         # Update active text display without affecting clipboard or history position.
+         # Only the tail that differs from the rendered partial is replaced, so the Tk work per
+         # partial follows the size of the change, not the length of the utterance.
+         old = self.rendered_partial
+         keep = stable_prefix_length(old, text) if old is not None else 0
          self.active_text.config(state=tk.NORMAL)
-         self.active_text.delete("1.0", tk.END)
-         self.active_text.insert("1.0", text)
+         if old is None:
+              self.active_text.delete("1.0", tk.END)
+         elif keep < len(old):
+              self.active_text.delete(f"1.0 + {keep} chars", tk.END)
+         if keep < len(text):
+              self.active_text.insert(tk.END if old is not None else "1.0", text[keep:], "unstable")
+         # Text that survived another partial unchanged is considered stable
+         if old is not None and keep > self.stable_chars:
+              self.active_text.tag_remove("unstable", f"1.0 + {self.stable_chars} chars", f"1.0 + {keep} chars")
+         self.rendered_partial = text
+         self.stable_chars = keep
          if not self.edit_mode:
               self.active_text.config(state=tk.DISABLED)
 
 
-    def update_active_text(self, text):
+    def update_active_text(self, text, segment=None):
         # This method is called when navigating history or saving a final result
+        self.rendered_partial = None
         self.active_text.config(state=tk.NORMAL)
         self.active_text.delete("1.0", tk.END)
         self.active_text.insert("1.0", text)
+        if segment is not None:
+             for start, end in self.word_store.low_confidence_spans(segment, text, LOW_CONFIDENCE_THRESHOLD):
+                  self.active_text.tag_add("low_conf", f"1.0 + {start} chars", f"1.0 + {end} chars")
         if self.clipboard_controlled_by_app:
              pyperclip.copy(text)
         if not self.edit_mode:
              self.active_text.config(state=tk.DISABLED)
 
 
-    def save_to_history(self, text):
+    def save_to_history(self, text, segment=None):
         if text.strip(): # Only save non-empty text after stripping whitespace
             # If we were viewing a history entry, and new text was transcribed,
             # the new text replaces the active_text but is a new entry.
             # If we were at the end of history or a fresh start, just append.
             if self.history_position == len(self.text_history):
                  self.text_history.append(text.strip())
+                 self.history_segments.append(segment)
             elif self.history_position != -1:
                  # If editing a history entry and saved, replace it
                  self.text_history[self.history_position] = text.strip()
+                 self.history_segments[self.history_position] = segment
                  # After saving an edit, we stay at that history position
             else:
                  # This case should ideally not happen if start_recording clears active_text
                  # and sets history_position correctly, but as a fallback:
                  self.text_history.append(text.strip())
+                 self.history_segments.append(segment)
                  self.history_position = len(self.text_history) - 1 # Move to the new end
 
             # Ensure history size is maintained
-            while len(self.text_history) > MAX_HISTORY_ENTRIES:
+            while len(self.text_history) > self.text_history.maxlen:
                 self.text_history.popleft()
+                self.history_segments.popleft()
 
             # After saving a new entry, the active text is the last one
             self.history_position = len(self.text_history) - 1
 
             self.update_history_display() # Update the history display widgets
-            self.update_active_text(self.text_history[self.history_position]) # Ensure active text is the saved one
+            self.update_active_text(self.text_history[self.history_position], self.history_segments[self.history_position]) # Ensure active text is the saved one
 
     def update_history_display(self):
         # Update history_above_text
@@ -322,7 +522,7 @@ class DictationApp:
         if 0 <= below_index < len(self.text_history):
             self.history_below_text.insert(tk.END, self.text_history[below_index])
             self.history_below_text.config(fg=FG_COLOR)
-        elif len(self.text_history) == MAX_HISTORY_ENTRIES and self.history_position == MAX_HISTORY_ENTRIES - 1:
+        elif len(self.text_history) == self.text_history.maxlen and self.history_position == self.text_history.maxlen - 1:
              # If at the end of a full history, show the oldest entry below
              self.history_below_text.insert("1.0", self.text_history[0]) # Insert at 1.0 to avoid newline
              self.history_below_text.config(fg=FG_COLOR)
@@ -336,7 +536,7 @@ class DictationApp:
         if self.edit_mode: return "break" # Prevent navigation in edit mode
         if self.history_position > 0:
             self.history_position -= 1
-            self.update_active_text(self.text_history[self.history_position])
+            self.update_active_text(self.text_history[self.history_position], self.history_segments[self.history_position])
             self.update_history_display()
         return "break" # Prevent default arrow key behavior
 
@@ -345,15 +545,31 @@ class DictationApp:
         if self.edit_mode: return "break" # Prevent navigation in edit mode
         if self.history_position < len(self.text_history) - 1:
             self.history_position += 1
-            self.update_active_text(self.text_history[self.history_position])
+            self.update_active_text(self.text_history[self.history_position], self.history_segments[self.history_position])
             self.update_history_display()
-        elif self.history_position == len(self.text_history) - 1 and len(self.text_history) == MAX_HISTORY_ENTRIES:
+        elif self.history_position == len(self.text_history) - 1 and len(self.text_history) == self.text_history.maxlen:
              # If at the end of a full history, wrap around to the oldest entry
              self.history_position = 0
-             self.update_active_text(self.text_history[self.history_position])
+             self.update_active_text(self.text_history[self.history_position], self.history_segments[self.history_position])
              self.update_history_display()
         return "break" # Prevent default arrow key behavior
 
+    def current_segment(self):
+        # WordStore segment of the history entry shown in active_text, if any
+        if 0 <= self.history_position < len(self.history_segments):
+            return self.history_segments[self.history_position]
+        return None
+
+    def jump_to_low_confidence_word(self, event=None):
+        # Move the cursor to the next low-confidence word, wrapping to the top
+        next_range = self.active_text.tag_nextrange("low_conf", "insert + 1 chars")
+        if not next_range:
+            next_range = self.active_text.tag_nextrange("low_conf", "1.0")
+        if next_range:
+            self.active_text.mark_set(tk.INSERT, next_range[0])
+            self.active_text.see(next_range[0])
+        return "break"
+
     def scroll_active_text_up(self, event=None):
         # Custom scroll up for active_text (line by line)
         if self.edit_mode: return # Allow default behavior in edit mode
@@ -372,6 +588,7 @@ class DictationApp:
             self.edit_mode = True
             self.edit_save_button.config(text="Save")
             self.set_active_text_editable(True)
+            self.rendered_partial = None # The user may change the text, partials no longer diff against it
             self.restore_text = self.active_text.get("1.0", tk.END).strip() # Save current text for restore
             self.settings_button.grid_forget() # Hide settings
             self.restore_button.grid(row=3, column=0, pady=10, sticky="ew") # Show restore
@@ -389,7 +606,7 @@ class DictationApp:
                  elif current_text: # If it's new text not from history, add it
                       self.save_to_history(current_text) # This will also update history_position and display
                  self.update_history_display() # Ensure history display reflects changes
-                 self.update_active_text(current_text) # Update clipboard with saved text
+                 self.update_active_text(current_text, self.current_segment()) # Update clipboard with saved text
                  self.status_label.config(text="Saved.", fg=STATUS_FG)
                  self.root.after(2000, lambda: self.status_label.config(text="Idle" if not self.is_recording else "Listening...", fg=STATUS_FG))
             else:
@@ -401,7 +618,7 @@ class DictationApp:
 
     def restore_text_content(self):
         if self.edit_mode:
-            self.update_active_text(self.restore_text)
+            self.update_active_text(self.restore_text, self.current_segment())
             self.status_label.config(text="Restored.", fg=STATUS_FG)
             self.root.after(2000, lambda: self.status_label.config(text="Editing...", fg="yellow"))
 
@@ -433,12 +650,214 @@ class DictationApp:
         # Allow the default copy event to proceed
         return
 
+    def toggle_profiler(self, event=None):
+        # Sample the capture, processing and UI threads for PROFILE_SECONDS, or stop a running capture early
+        if self.profiler.is_running():
+            self.profiler.stop()
+            return "break"
+        self.profiler.start(PROFILE_SECONDS, on_done=lambda path: self.root.after(0, self.on_profile_written, path))
+        self.status_label.config(text=f"Profiling ({PROFILE_SECONDS}s)...", fg="yellow")
+        return "break"
+
+    def on_profile_written(self, path):
+        print(f"Profile written to {path}")
+        self.status_label.config(text="Profile saved", fg=STATUS_FG)
+        self.root.after(2000, lambda: self.status_label.config(text="Idle" if not self.is_recording else "Listening...", fg=STATUS_FG))
+
     def open_settings(self):
-        # Placeholder for settings window
-        print("Settings button clicked (placeholder)")
-        # TODO: Implement settings window for mic selection, visual effects, theme
+        if self.settings_dialog is not None and self.settings_dialog.winfo_exists():
+            self.settings_dialog.lift()
+            return
+        self.settings_dialog = SettingsDialog(self.root, self.config.values, self.apply_settings,
+                                              bg=BG_COLOR, fg=FG_COLOR, button_bg=BUTTON_BG,
+                                              choices={"model": self.models.available(), "input_device": self.input_device_names()})
+
+    def input_device_names(self):
+        try:
+            return [info["device"] for info in list_input_devices()]
+        except Exception as e:  # No PortAudio, or it failed to enumerate devices
+            print(f"Could not list input devices: {e}")
+            return []
+
+    def apply_settings(self, values):
+        # Called by the Settings dialog; raises ValueError for values it should show back to the user
+        values = {key: self.config.coerce(key, value) for key, value in values.items()}
+        if values["silence_threshold"] < 0 or values["max_silence_duration"] <= 0 or values["chunk_duration"] <= 0:
+            raise ValueError("Thresholds and durations must be positive")
+        if values["queue_max_chunks"] < 1 or values["max_history_entries"] < 1:
+            raise ValueError("Queue size and history entries must be at least 1")
+        if values["model_memory_budget_mb"] < 1:
+            raise ValueError("Model memory budget must be at least 1 MB")
+        if values["idle_unload_minutes"] < 0:
+            raise ValueError("Idle unload minutes cannot be negative")
+        if not 0 <= values["noise_word_confidence"] <= 1:
+            raise ValueError("Noise word confidence must be between 0 and 1")
+        changed = self.config.update(values)
+        try:
+            self.config.save()
+        except OSError as e:
+            print(f"Error saving settings: {e}")  # Still applied for this run
+        config = self.config
+
+        if "max_history_entries" in changed:
+            # Shrinking drops the oldest entries, so indices move down; the append position
+            # (one past the end) stays one past the end
+            old_length = len(self.text_history)
+            self.text_history = deque(self.text_history, maxlen=config["max_history_entries"])
+            self.history_segments = deque(self.history_segments, maxlen=config["max_history_entries"])
+            if self.history_position == old_length:
+                self.history_position = len(self.text_history)
+            elif self.history_position != -1:
+                self.history_position = max(0, self.history_position - (old_length - len(self.text_history)))
+            self.update_history_display()
+        if "model_memory_budget_mb" in changed:
+            self.models.set_budget(config["model_memory_budget_mb"] * 2**20)
+        if "model" in changed or self.engine is None:
+            self.switch_model(config["model"])
+        if self.engine is None:
+            return
+
+        # Everything else is applied to the running engine between chunks, no restart needed
+        engine_settings = {key: config[key] for key in ("silence_threshold", "max_silence_duration", "chunk_duration",
+                                                         "queue_max_chunks", "queue_policy", "max_utterance_seconds")
+                           if key in changed}
+        if "adaptive_endpointing" in changed:
+            engine_settings["endpointer"] = self.make_endpointer()
+            engine_settings["max_silence_duration"] = config["max_silence_duration"]
+        if "denoise" in changed:
+            engine_settings["denoiser"] = self.make_denoiser()
+        if "noise_word_confidence" in changed:
+            engine_settings["noise_filter"] = self.make_noise_filter()
+        if engine_settings:
+            self.engine.configure(**engine_settings)
+
+    def switch_model(self, name):
+        # A cached model is switched to at once; loading a new one takes seconds, so it happens
+        # in the background and dictation keeps running on the old model meanwhile
+        if self.models.is_loaded(name):
+            model = self.models.get(name)
+            self.on_model_loaded(name, model, vosk.KaldiRecognizer(model, self.samplerate))
+            return
+        self.status_label.config(text="Loading model...", fg="yellow")
+        self.model_loading = True
+
+        def load():
+            try:
+                model = self.models.get(name)
+                recognizer = vosk.KaldiRecognizer(model, self.samplerate)
+            except Exception as e:
+                self.root.after(0, self.on_model_error, name, e)
+                return
+            self.root.after(0, self.on_model_loaded, name, model, recognizer)
+
+        threading.Thread(target=load, name="model-loader", daemon=True).start()
+
+    def switch_to_previous_model(self, event=None):
+        # Ctrl+M toggles between the two most recently used models
+        recent = self.models.recent()
+        if len(recent) > 1 and self.engine is not None:
+            self.config.update({"model": recent[1]})
+            try:
+                self.config.save()
+            except OSError as e:
+                print(f"Error saving settings: {e}")
+            self.switch_model(recent[1])
+        return "break"
+
+    def on_model_loaded(self, name, model, recognizer):
+        self.model_loading = False
+        self.model_unloaded = False
+        self.model = model
+        self.models.set_active(name)
+        if self.engine is None:
+            self.create_engine(recognizer)
+            self.toggle_button.config(state=tk.NORMAL)
+            self.edit_save_button.config(state=tk.NORMAL)
+        else:
+            # Swapped in by the processing thread once the current utterance is finalized
+            self.recognizer = recognizer
+            self.engine.configure(recognizer=recognizer)
+        self.status_label.config(text=f"Model: {os.path.basename(self.models.resolve(name))}", fg=STATUS_FG)
+        self.root.after(2000, lambda: self.status_label.config(text="Idle" if not self.is_recording else "Listening...", fg=STATUS_FG))
+        if self.start_when_loaded:
+            self.start_when_loaded = False
+            if not self.is_recording:
+                self.start_recording()
+
+    def control_handlers(self):
+        # Commands accepted on the control socket, run on the Tk thread
+        return {
+            "toggle": self.toggle_recording,
+            "start": lambda: None if self.is_recording or self.start_when_stopped else self.toggle_recording(),
+            "stop": lambda: self.toggle_recording() if self.is_recording or self.start_when_stopped else None,
+            "copy-last": self.copy_last_entry,
+            "show": self.show_window,
+        }
+
+    def copy_last_entry(self):
+        if not self.text_history:
+            raise LookupError("nothing transcribed yet")
+        pyperclip.copy(self.text_history[-1])
+
+    def show_window(self):
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+        self.note_activity()
+
+    def on_close(self):
+        if self.control is not None:
+            self.control.close()
+        self.output_sinks.close()  # Flush and close file and FIFO outputs; sink threads never call into Tk
+        self.root.destroy()
+
+    def note_activity(self, event=None):
+        self.last_activity = time.monotonic()
+        if self.model_unloaded and not self.model_loading:
+            # model_unloaded stays set until on_model_loaded, so a failed reload is retried
+            self.switch_model(self.config["model"])
+
+    def check_idle(self):
+        idle_minutes = self.config["idle_unload_minutes"]
+        if (idle_minutes > 0 and not self.model_unloaded and not self.model_loading and not self.is_recording
+                and not self.engine.is_busy() and time.monotonic() - self.last_activity > idle_minutes * 60):
+            self.unload_model()
+        self.root.after(IDLE_CHECK_MS, self.check_idle)
+
+    def unload_model(self):
+        # Every reference to the model has to go, or its memory stays resident
+        rss_before = resident_memory()
+        self.engine.release_recognizer()
+        self.recognizer = None
+        self.model = None
+        self.models.unload_all()
+        self.model_unloaded = True
+        rss_after = resident_memory()
+        if rss_before is not None:
+            print(f"Model unloaded after {self.config['idle_unload_minutes']:g} idle minutes: "
+                  f"RSS {rss_before / 2**20:.0f} MB -> {rss_after / 2**20:.0f} MB")
+        self.status_label.config(text="Idle (model unloaded)", fg=STATUS_FG)
+
+    def on_model_error(self, name, e):
+        self.model_loading = False
+        self.start_when_loaded = False
+        print(f"Error loading Vosk model {name}: {e}")
+        self.status_label.config(text=f"Model error: {e}", fg="red")
 
 if __name__ == "__main__":
+    # A second launch hands its command (toggle, start, stop, copy-last, ...) to the running window
+    # instead of loading the model again; without one, the window starts and then runs the command
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    reply = send_command(command)
+    if reply is not None:
+        if reply != "ok":
+            print(reply)
+        sys.exit(0 if reply == "ok" else 1)
     root = tk.Tk()
     app = DictationApp(root)
+    handler = app.control_handlers().get(command)
+    if handler is None:
+        print(f"Unknown command '{command}', expected one of {', '.join(sorted(app.control_handlers()))}")
+    elif command != "show":
+        root.after(0, handler)
     root.mainloop()
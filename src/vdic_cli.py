@@ -0,0 +1,198 @@
+import time
+
+PROCESS_START = time.monotonic()  # Before the heavy imports, so time-to-first-event includes them
+
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+
+from audio_sources import MicrophoneSource, RawPcmSource, WavFileSource
+from denoise import StreamingDenoiser
+from device_probe import remembered_input
+from dictation_engine import DictationEngine
+from endpointing import AdaptiveEndpointer
+from fake_recognizer import FakeRecognizer
+from model_registry import ModelRegistry
+from noise_filter import NoiseWordFilter
+
+# Headless dictation: audio from the microphone, a WAV file or raw PCM on stdin, one JSON
+# object per line on stdout, flushed as soon as it is produced.
+#
+#   python vdic_cli.py --model vosk-model-small-en-us-0.15 | jq -r 'select(.type == "final") | .text'
+#   arecord -q -f S16_LE -r 16000 -c 1 | python vdic_cli.py --stdin --no-partials
+#   python vdic_cli.py --wav meeting.wav --words > meeting.jsonl
+#
+# Event types: ready, partial, final, lag, error, stopped. Every event has "time", seconds since
+# the process started. The stopped event carries the engine stats plus time_to_first_event.
+# SIGINT/SIGTERM stop capture, drain the queued audio and emit stopped before exiting, and with
+# systemd Type=notify the service reports READY=1 once the model is loaded. The exit status is
+# 1 if the model could not be loaded or any error event was emitted.
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "../models")
+DEFAULT_MODEL = "vosk-model-en-us-0.22"
+EXIT_WAIT_SECONDS = 2.0  # Grace period for the capture thread after the final results, e.g. one blocked on stdin
+
+
+class EventWriter:
+    def __init__(self, stream, include_words=False):
+        self.stream = stream
+        self.include_words = include_words
+        self.lock = threading.Lock()
+        self.first_event_time = None
+        self.closed = False  # The reader went away (e.g. `| head -1`)
+
+    def emit(self, event_type, **fields):
+        event = {"type": event_type, "time": round(time.monotonic() - PROCESS_START, 3)}
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            if event_type in ("partial", "final") and self.first_event_time is None:
+                self.first_event_time = event["time"]
+            if self.closed:
+                return
+            try:
+                self.stream.write(line)
+                self.stream.flush()
+            except BrokenPipeError:
+                self.closed = True
+
+
+def notify_systemd(state):
+    # sd_notify without libsystemd: a datagram to $NOTIFY_SOCKET, a no-op outside systemd
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # Abstract socket namespace
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.connect(address)
+        sock.sendall(state.encode())
+
+
+def make_source_factory(args):
+    if args.wav:
+        return lambda samplerate: WavFileSource(args.wav, samplerate, speed=1.0 if args.realtime else None)
+    if args.stdin:
+        # Unbuffered: a read still blocked at exit would otherwise hold the buffer's lock and abort
+        # interpreter shutdown
+        return lambda samplerate: RawPcmSource(sys.stdin.buffer.raw, samplerate, speed=1.0 if args.realtime else None)
+    input_settings = {"device": args.device} if args.device is not None else remembered_input()
+    return lambda samplerate: MicrophoneSource(samplerate, **input_settings)
+
+
+def make_recognizer(args):
+    if args.fake:
+        return FakeRecognizer(args.samplerate)
+    import vosk
+    vosk.SetLogLevel(-1)  # Kaldi logs to stderr otherwise, mixed into the service journal
+    model = ModelRegistry(MODELS_DIR, float("inf")).get(args.model)
+    return vosk.KaldiRecognizer(model, args.samplerate)
+
+
+def parse_device(value):
+    return int(value) if value.isdigit() else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless dictation, newline-delimited JSON events on stdout")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--wav", help="transcribe a 16-bit mono WAV file instead of the microphone")
+    source.add_argument("--stdin", action="store_true", help="read raw 16-bit little-endian mono PCM from stdin")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model directory name under models/, or a path")
+    parser.add_argument("--fake", action="store_true", help="use the fake recognizer, for testing pipelines")
+    parser.add_argument("--device", type=parse_device, help="input device index or name (see device_probe.py --list); default is the probed fastest device")
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--chunk", type=float, default=0.1, help="seconds of audio per recognizer call")
+    parser.add_argument("--silence-threshold", type=float, default=100, help="VAD energy threshold")
+    parser.add_argument("--max-silence", type=float, default=3.0, help="seconds of silence that end a segment")
+    parser.add_argument("--adaptive-endpointing", action="store_true",
+                        help="learn the end-of-segment silence from the speaker's pauses, up to --max-silence")
+    parser.add_argument("--max-utterance", type=float, default=30.0, help="force a segment boundary after this long, 0 = off")
+    parser.add_argument("--denoise", action="store_true", help="spectral noise gate before VAD and recognition")
+    parser.add_argument("--noise-word-confidence", type=float, default=0.5,
+                        help="drop words below this confidence over quiet audio or at a segment edge, 0 = off")
+    parser.add_argument("--queue-policy", choices=("block", "drop_oldest", "skip_silence"),
+                        help="overload policy; default block for files and stdin, skip_silence for the microphone")
+    parser.add_argument("--realtime", action="store_true", help="pace file and stdin input at real time")
+    parser.add_argument("--no-partials", action="store_true", help="only emit final results")
+    parser.add_argument("--words", action="store_true", help="include per-word timings and confidences in finals")
+    args = parser.parse_args()
+
+    writer = EventWriter(sys.stdout, include_words=args.words)
+    try:
+        recognizer = make_recognizer(args)
+    except Exception as e:
+        writer.emit("error", message=f"Could not load model: {e}")
+        return 1
+
+    file_input = bool(args.wav or args.stdin)
+    engine = DictationEngine(recognizer, args.samplerate, chunk_duration=args.chunk,
+                             source_factory=make_source_factory(args), silence_threshold=args.silence_threshold,
+                             max_silence_duration=args.max_silence,
+                             queue_policy=args.queue_policy or ("block" if file_input else "skip_silence"),
+                             max_utterance_seconds=args.max_utterance or None,
+                             endpointer=AdaptiveEndpointer(max_delay=args.max_silence) if args.adaptive_endpointing else None,
+                             denoiser=StreamingDenoiser(args.samplerate) if args.denoise else None,
+                             noise_filter=NoiseWordFilter(args.noise_word_confidence) if args.noise_word_confidence else None)
+
+    def on_final(text, segment):
+        event = {"text": text, "segment": segment}
+        if segment is not None:
+            words = engine.word_store.segment_words(segment)
+            if words:
+                event["start"] = round(float(words[0][1]), 2)
+                event["end"] = round(float(words[-1][2]), 2)
+                event["confidence"] = round(float(engine.word_store.segment_confidence(segment)), 3)
+            if writer.include_words:
+                event["words"] = [{"word": word, "start": round(float(start), 2), "end": round(float(end), 2),
+                                   "conf": round(float(conf), 3)} for word, start, end, conf in words]
+        writer.emit("final", **event)
+
+    stopped = threading.Event()
+    if not args.no_partials:
+        engine.on_partial = lambda text: writer.emit("partial", text=text)
+    engine.on_final = on_final
+    if not file_input or args.realtime:
+        # Unpaced file input is always "behind" by design, lag only means something in real time
+        engine.on_lag = lambda falling_behind, lag: writer.emit("lag", falling_behind=falling_behind, seconds=round(lag, 2))
+    errors = []
+
+    def on_error(e):
+        errors.append(e)
+        writer.emit("error", message=str(e))
+
+    engine.on_error = on_error
+    engine.on_stopped = lambda stats: stopped.set()
+
+    # Stop capture on Ctrl+C or systemctl stop; the queued audio is still transcribed
+    signal.signal(signal.SIGINT, lambda signum, frame: engine.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: engine.stop())
+
+    writer.emit("ready", samplerate=args.samplerate, startup_seconds=round(time.monotonic() - PROCESS_START, 3))
+    notify_systemd("READY=1")
+    engine.start()
+    while not stopped.wait(0.2):
+        if writer.closed:
+            engine.stop()  # Nobody is reading any more
+    # Processing is done; a capture thread still blocked in a read (stdin with no writer) is a
+    # daemon thread and must not keep systemctl stop waiting
+    engine.wait(EXIT_WAIT_SECONDS)
+
+    notify_systemd("STOPPING=1")
+    stats = {key: round(value, 4) if isinstance(value, float) else value for key, value in engine.stats().items()}
+    stats["stages"] = {name: {key: round(value, 4) if isinstance(value, float) else value for key, value in stage.items()}
+                       for name, stage in stats["stages"].items()}
+    stats["time_to_first_event"] = writer.first_event_time
+    writer.emit("stopped", stats=stats)
+    if writer.closed:
+        # Keep the interpreter from reporting the broken pipe again when it flushes stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 1 if errors else 0  # Lets pipelines and systemd see a failed source or stage
+
+
+if __name__ == "__main__":
+    sys.exit(main())
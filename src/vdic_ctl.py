@@ -0,0 +1,39 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from control_socket import send_command
+
+# Sends a command to the running dictation window, for desktop hotkeys. Only the socket module
+# is imported, so a hotkey round trip takes milliseconds rather than a Python+Vosk startup.
+#
+#   python vdic_ctl.py toggle                  start or stop recording
+#   python vdic_ctl.py copy-last               put the last transcript on the clipboard
+#   python vdic_ctl.py toggle --launch vdic    start vdic.py (and then record) if it is not running
+
+COMMANDS = ("toggle", "start", "stop", "copy-last", "archive", "show")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Control a running dictation window")
+    parser.add_argument("command", choices=COMMANDS, help="archive is only available in main1.py")
+    parser.add_argument("--launch", choices=("vdic", "main1"), help="start this app if no window is running")
+    args = parser.parse_args()
+
+    reply = send_command(args.command)
+    if reply is None:
+        if not args.launch:
+            print("No dictation window is running")
+            return 1
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{args.launch}.py")
+        subprocess.Popen([sys.executable, script, args.command], start_new_session=True)
+        return 0
+    if reply != "ok":
+        print(reply)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import re
+from array import array
+
+
+class Vocabulary:
+    # Interns each distinct word once so the store only keeps a 4-byte id per occurrence
+    def __init__(self):
+        self._ids = {}
+        self._words = []
+
+    def intern(self, word):
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = len(self._words)
+            self._ids[word] = word_id
+            self._words.append(word)
+        return word_id
+
+    def word(self, word_id):
+        return self._words[word_id]
+
+    def __len__(self):
+        return len(self._words)
+
+
+class WordStore:
+    # Column store for the per-word data Vosk returns with SetWords(True).
+    # Word i of the whole session lives at index i of every column; segment k
+    # (one final result) spans segment_offsets[k]:segment_offsets[k + 1].
+    def __init__(self):
+        self.vocabulary = Vocabulary()
+        self.starts = array("f")  # Seconds from the start of the recognizer stream
+        self.ends = array("f")
+        self.confs = array("f")
+        self.word_ids = array("I")
+        self.segment_offsets = array("I", [0])
+
+    def add_result(self, result):
+        # Store the "result" list of a Vosk final result and return its segment index
+        for word in result.get("result", ()):
+            self.starts.append(word.get("start", 0.0))
+            self.ends.append(word.get("end", 0.0))
+            self.confs.append(word.get("conf", 1.0))
+            self.word_ids.append(self.vocabulary.intern(word["word"]))
+        self.segment_offsets.append(len(self.word_ids))
+        return len(self.segment_offsets) - 2
+
+    def __len__(self):
+        return len(self.segment_offsets) - 1
+
+    def word_count(self):
+        return len(self.word_ids)
+
+    def segment_range(self, segment):
+        if not 0 <= segment < len(self):
+            raise IndexError(f"segment {segment} out of range")
+        return self.segment_offsets[segment], self.segment_offsets[segment + 1]
+
+    def segment_words(self, segment):
+        # List of (word, start, end, conf) tuples, materialized on demand
+        first, last = self.segment_range(segment)
+        word = self.vocabulary.word
+        return [(word(self.word_ids[i]), self.starts[i], self.ends[i], self.confs[i]) for i in range(first, last)]
+
+    def segment_text(self, segment):
+        first, last = self.segment_range(segment)
+        return " ".join(self.vocabulary.word(self.word_ids[i]) for i in range(first, last))
+
+    def segment_confidence(self, segment):
+        # Mean word confidence of a segment, 1.0 for segments without words
+        first, last = self.segment_range(segment)
+        if first == last:
+            return 1.0
+        return sum(self.confs[first:last]) / (last - first)
+
+    def low_confidence_spans(self, segment, text, threshold):
+        # Character (start, end) spans in text for the segment's words below threshold.
+        # Words are matched left to right as whole tokens ("a" never matches inside "cat"), so
+        # edited text only keeps the spans it still contains.
+        spans = []
+        position = 0
+        for word, _, _, conf in self.segment_words(segment):
+            found = re.compile(rf"(?<!\w){re.escape(word)}(?!\w)").search(text, position)
+            if found is None:
+                continue
+            position = found.end()
+            if conf < threshold:
+                spans.append(found.span())
+        return spans
+
+    def nbytes(self):
+        columns = (self.starts, self.ends, self.confs, self.word_ids, self.segment_offsets)
+        return sum(column.itemsize * len(column) for column in columns)